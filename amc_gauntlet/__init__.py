@@ -0,0 +1,13 @@
+"""AMC 8 Gauntlet game package.
+
+The engine is re-exported here; pygame is only imported by the front end.
+"""
+from .engine import (
+    LEVELS,
+    Challenge,
+    Player,
+    check_answer,
+    generate_challenge_for_level,
+    generate_hint,
+)
+from .plugins import registry
@@ -0,0 +1,145 @@
+"""Safe answer checking.
+
+Player input is parsed by a small arithmetic tokenizer and recursive-descent
+parser (numbers, + - * / ^ ** and parentheses) into an exact ``Fraction``, so
+"2/4", "0.5" and "1/2" all compare equal. Input length, exponents and the size
+of every intermediate value are capped, so no submission can stall the
+checker. Correct answers are canonicalized once and memoized.
+"""
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+MAX_INPUT_LENGTH = 64
+MAX_EXPONENT = 64
+MAX_BITS = 256 # Limit on numerator/denominator size of any intermediate value
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d*)?|\.\d+)|(\*\*|[-+*/^()]))")
+
+
+class InvalidAnswer(ValueError):
+    pass
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None:
+            raise InvalidAnswer(f"Unexpected input at position {pos}")
+        number, op = match.groups()
+        tokens.append(Fraction(number) if number is not None else ("^" if op == "**" else op))
+        pos = match.end()
+    return tokens
+
+
+def _checked(value):
+    if value.numerator.bit_length() > MAX_BITS or value.denominator.bit_length() > MAX_BITS:
+        raise InvalidAnswer("Value too large")
+    return value
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse(self):
+        value = self.expression()
+        if self.pos != len(self.tokens):
+            raise InvalidAnswer("Unexpected trailing input")
+        return value
+
+    def expression(self):
+        value = self.term()
+        while self.peek() in ("+", "-"):
+            if self.take() == "+":
+                value = _checked(value + self.term())
+            else:
+                value = _checked(value - self.term())
+        return value
+
+    def term(self):
+        value = self.unary()
+        while self.peek() in ("*", "/"):
+            if self.take() == "*":
+                value = _checked(value * self.unary())
+            else:
+                divisor = self.unary()
+                if divisor == 0:
+                    raise InvalidAnswer("Division by zero")
+                value = _checked(value / divisor)
+        return value
+
+    def unary(self):
+        if self.peek() == "-":
+            self.take()
+            return -self.unary()
+        if self.peek() == "+":
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        if self.peek() != "^":
+            return base
+        self.take()
+        exponent = self.unary() # Right-associative, like Python's **
+        if exponent.denominator != 1 or abs(exponent) > MAX_EXPONENT:
+            raise InvalidAnswer("Unsupported exponent")
+        if base == 0 and exponent < 0:
+            raise InvalidAnswer("Division by zero")
+        bits = max(base.numerator.bit_length(), base.denominator.bit_length())
+        if bits * abs(exponent.numerator) > MAX_BITS:
+            raise InvalidAnswer("Value too large")
+        return base ** exponent.numerator
+
+    def atom(self):
+        token = self.take()
+        if isinstance(token, Fraction):
+            return token
+        if token == "(":
+            value = self.expression()
+            if self.take() != ")":
+                raise InvalidAnswer("Unbalanced parentheses")
+            return value
+        raise InvalidAnswer("Expected a number")
+
+
+def parse_answer(text):
+    text = text.strip()
+    if not text:
+        raise InvalidAnswer("Empty answer")
+    if len(text) > MAX_INPUT_LENGTH:
+        raise InvalidAnswer("Answer too long")
+    return _Parser(_tokenize(text)).parse()
+
+
+@lru_cache(maxsize=4096)
+def canonical_answer(answer_text):
+    # Canonical form of a correct answer: an exact Fraction, or the normalized
+    # string for answers that are not numeric.
+    try:
+        return parse_answer(answer_text)
+    except InvalidAnswer:
+        return answer_text.lower().strip()
+
+
+def check_answer(challenge, text):
+    correct = canonical_answer(challenge.answer)
+    try:
+        given = parse_answer(text)
+    except InvalidAnswer:
+        given = text.lower().strip()
+    return given == correct
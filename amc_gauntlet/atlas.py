@@ -0,0 +1,57 @@
+"""Pre-rendered surfaces for buttons and other static UI.
+
+Widgets whose look depends only on a few values (a button's size, label,
+colors and the background behind its rounded corners; the info panel's
+contents) are drawn once into their own surface, converted to the display's
+pixel format and then blitted, so a board frame is a handful of blits rather
+than rounded-rect fills, borders and text rendering.
+
+Surfaces are keyed by everything that affects their pixels, so a stale one is
+never shown. ``sync(version)`` drops the whole atlas when the value passed in
+changes (the front end passes the player's level progress and power-up
+counts), which is when most buttons change state; an LRU bound keeps
+anything else (e.g. info panels for every mastery value) from piling up.
+"""
+from collections import OrderedDict
+
+
+class SurfaceAtlas:
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+        self._surfaces = OrderedDict()
+
+    def get(self, key, build):
+        # Returns (surface, offset). On a miss build() is called and must return
+        # the same pair: a pygame Surface and where its top-left corner goes
+        # relative to the widget's rect (non-zero when e.g. a label is wider
+        # than its button).
+        entry = self._surfaces.get(key)
+        if entry is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        surface, offset = build()
+        entry = (surface.convert(), offset) # Same pixel format as the display, so blits need no conversion
+        self._surfaces[key] = entry
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return entry
+
+    def sync(self, version):
+        # Returns True if the atlas was cleared.
+        if version == self.version:
+            return False
+        self.version = version
+        self._surfaces.clear()
+        return True
+
+    def __contains__(self, key):
+        return key in self._surfaces
+
+    def __len__(self):
+        return len(self._surfaces)
@@ -0,0 +1,338 @@
+"""Vectorized batch challenge generation.
+
+``generate_batch(level, n, seed)`` draws the parameters for ``n`` problems as
+NumPy arrays and computes every answer in one pass per problem kind. The result
+is a columnar ``ChallengeBatch``; question text and ``Challenge`` objects are only
+built for the rows that are actually read.
+
+The kinds and their probabilities mirror the branches of the scalar generators
+in ``amc_gauntlet.engine`` at medium difficulty, and a row formats to exactly the question and answer
+text the scalar generator would have produced for the same parameters.
+"""
+import numpy as np
+
+from .engine import Challenge
+
+NUMBER_THEORY = "Number Theory Nexus"
+GEOMETRY = "Geometry Gymnasium"
+ALGEBRA = "Algebra Arena"
+COUNTING = "Counting & Probability Citadel"
+PINNACLE = "Problem-Solving Pinnacle"
+
+# (name, level, topic, skill_token, question template)
+# Templates are formatted with the row's parameters (see KIND_PARAMS).
+KINDS = [
+    ("remainder", NUMBER_THEORY, "Modular Arithmetic", "Number Sense Navigator",
+     "What is the remainder when {num} is divided by {divisor}?"),
+    ("largest_prime_factor", NUMBER_THEORY, "Prime Factors", "Number Sense Navigator",
+     "What is the largest prime factor of {num}?"),
+    ("gcd", NUMBER_THEORY, "GCD Calculation", "Number Sense Navigator",
+     "What is the Greatest Common Divisor (GCD) of {a} and {b}?"),
+    ("lcm", NUMBER_THEORY, "LCM Calculation", "Number Sense Navigator",
+     "What is the Least Common Multiple (LCM) of {a} and {b}?"),
+    ("rectangle_area", GEOMETRY, "Area/Perimeter", "Geometric Intuition",
+     "A rectangle has length {length} and width {width}. What is its area?"),
+    ("rectangle_perimeter", GEOMETRY, "Area/Perimeter", "Geometric Intuition",
+     "A rectangle has length {length} and width {width}. What is its perimeter?"),
+    ("square_area", GEOMETRY, "Area/Perimeter", "Geometric Intuition",
+     "A square has a side length of {side}. What is its area?"),
+    ("square_perimeter", GEOMETRY, "Area/Perimeter", "Geometric Intuition",
+     "A square has a side length of {side}. What is its perimeter?"),
+    ("complementary", GEOMETRY, "Angle Relationships", "Geometric Intuition",
+     "Two angles are complementary. One angle is {angle} degrees. What is the other angle?"),
+    ("supplementary", GEOMETRY, "Angle Relationships", "Geometric Intuition",
+     "Two angles are supplementary. One angle is {angle} degrees. What is the other angle?"),
+    ("hypotenuse", GEOMETRY, "Pythagorean Theorem", "Geometric Intuition",
+     "A right triangle has legs of length {a} and {b}. What is the length of the hypotenuse?"),
+    ("leg_given_a", GEOMETRY, "Pythagorean Theorem", "Geometric Intuition",
+     "A right triangle has a hypotenuse of {c} and one leg of {a}. What is the length of the other leg?"),
+    ("leg_given_b", GEOMETRY, "Pythagorean Theorem", "Geometric Intuition",
+     "A right triangle has a hypotenuse of {c} and one leg of {b}. What is the length of the other leg?"),
+    ("linear_equation", ALGEBRA, "Linear Equations", "Algebra Alchemist",
+     "Solve for x: {a}x + {b} = {c}"),
+    ("word_problem", ALGEBRA, "Word Problems", "Algebra Alchemist",
+     "John bought {num_items} apples, each costing ${cost_per_item}. How much did he pay in total?"),
+    ("expression_eval", ALGEBRA, "Expression Evaluation", "Algebra Alchemist",
+     "If {var} = {val}, what is {num1}{var} {op} {num2}?"),
+    ("permutations", COUNTING, "Permutations", "Combinatorics Commander",
+     "How many ways can {num_items} distinct items be arranged in a line?"),
+    ("die_number", COUNTING, "Die Probability", "Probability Prophet",
+     "What is the probability of rolling a {target} on a {die_sides}-sided die?"),
+    ("die_even", COUNTING, "Die Probability", "Probability Prophet",
+     "What is the probability of rolling an even number on a {die_sides}-sided die?"),
+    ("die_odd", COUNTING, "Die Probability", "Probability Prophet",
+     "What is the probability of rolling an odd number on a {die_sides}-sided die?"),
+    ("coin_all_heads", COUNTING, "Coin Probability", "Probability Prophet",
+     "If you flip a fair coin {num_flips} times, what is the probability of getting all heads?"),
+    ("coin_all_tails", COUNTING, "Coin Probability", "Probability Prophet",
+     "If you flip a fair coin {num_flips} times, what is the probability of getting all tails?"),
+    ("coin_one_head", COUNTING, "Coin Probability", "Probability Prophet",
+     "If you flip a fair coin {num_flips} times, what is the probability of getting exactly one head?"),
+]
+KIND_CODES = {kind[0]: code for code, kind in enumerate(KINDS)}
+
+# Names of the parameter columns of each kind, plus the fixed parameters the
+# scalar generator records for that branch. Together they make up the
+# Challenge.params dict a row expands to.
+KIND_PARAMS = {
+    "remainder": (("num", "divisor"), {}),
+    "largest_prime_factor": (("num", "p"), {}),
+    "gcd": (("a", "b"), {}),
+    "lcm": (("a", "b"), {}),
+    "rectangle_area": (("length", "width"), {"shape": "rectangle", "metric": "area"}),
+    "rectangle_perimeter": (("length", "width"), {"shape": "rectangle", "metric": "perimeter"}),
+    "square_area": (("side",), {"shape": "square", "metric": "area"}),
+    "square_perimeter": (("side",), {"shape": "square", "metric": "perimeter"}),
+    "complementary": (("angle",), {"relation": "complementary"}),
+    "supplementary": (("angle",), {"relation": "supplementary"}),
+    "hypotenuse": (("a", "b", "c"), {"missing": "hypotenuse"}),
+    "leg_given_a": (("a", "b", "c", "leg"), {"missing": "leg"}),
+    "leg_given_b": (("a", "b", "c", "leg"), {"missing": "leg"}),
+    "linear_equation": (("a", "b", "c"), {}),
+    "word_problem": (("num_items", "cost_per_item"), {}),
+    "expression_eval": (("var", "val", "op", "num1", "num2"), {}),
+    "permutations": (("num_items",), {}),
+    "die_number": (("die_sides", "target"), {"target_type": "number"}),
+    "die_even": (("die_sides",), {"target_type": "even"}),
+    "die_odd": (("die_sides",), {"target_type": "odd"}),
+    "coin_all_heads": (("num_flips",), {"event": "all heads"}),
+    "coin_all_tails": (("num_flips",), {"event": "all tails"}),
+    "coin_one_head": (("num_flips",), {"event": "exactly one head"}),
+}
+
+# Probability of each kind per level, following the random.choice tree of the
+# matching scalar generator.
+LEVEL_KIND_WEIGHTS = {
+    NUMBER_THEORY: {"remainder": 1/3, "largest_prime_factor": 1/3, "gcd": 1/6, "lcm": 1/6},
+    GEOMETRY: {
+        "rectangle_area": 1/12, "rectangle_perimeter": 1/12, "square_area": 1/12, "square_perimeter": 1/12,
+        "complementary": 1/6, "supplementary": 1/6,
+        "hypotenuse": 1/6, "leg_given_a": 1/12, "leg_given_b": 1/12,
+    },
+    ALGEBRA: {"linear_equation": 1/3, "word_problem": 1/3, "expression_eval": 1/3},
+    COUNTING: {
+        "permutations": 1/3, "die_number": 1/9, "die_even": 1/9, "die_odd": 1/9,
+        "coin_all_heads": 1/9, "coin_all_tails": 1/9, "coin_one_head": 1/9,
+    },
+}
+LEVEL_KIND_WEIGHTS[PINNACLE] = {
+    kind: weight / 4 for level in (NUMBER_THEORY, GEOMETRY, ALGEBRA, COUNTING)
+    for kind, weight in LEVEL_KIND_WEIGHTS[level].items()
+}
+
+MAX_PARAMS = 5
+EXPRESSION_VARS = ("x", "a", "y")
+EXPRESSION_OPS = ("+", "-", "*")
+PRIMES_FROM_13 = np.array([13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97])
+SMALL_PRIMES = np.array([2, 3, 5, 7])
+PYTHAGOREAN_TRIPLES = np.array([(3, 4, 5), (5, 12, 13), (8, 15, 17), (7, 24, 25)])
+FACTORIALS = np.array([1, 1, 2, 6, 24, 120])
+
+
+class ChallengeBatch:
+    def __init__(self, kinds, params, numerators, denominators):
+        self.kinds = kinds # int8 codes into KINDS
+        self.params = params # (n, MAX_PARAMS) int64
+        self.numerators = numerators
+        self.denominators = denominators # 0 for integer answers
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def row_params(self, i):
+        kind = int(self.kinds[i])
+        columns, fixed = KIND_PARAMS[KINDS[kind][0]]
+        params = dict(zip(columns, self.params[i].tolist()))
+        params.update(fixed)
+        if kind == KIND_CODES["expression_eval"]:
+            params["var"] = EXPRESSION_VARS[params["var"]]
+            params["op"] = EXPRESSION_OPS[params["op"]]
+        return params
+
+    def question(self, i):
+        return KINDS[self.kinds[i]][4].format_map(self.row_params(i))
+
+    def answer(self, i):
+        denominator = int(self.denominators[i])
+        if denominator:
+            return f"{self.numerators[i]}/{denominator}"
+        return str(self.numerators[i])
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("batch index out of range")
+        _, level, topic, skill_token, template = KINDS[self.kinds[i]]
+        params = self.row_params(i)
+        return Challenge(level, topic, template.format_map(params), self.answer(i), skill_token, params=params)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def generate_batch(level, n, seed=None):
+    weights = LEVEL_KIND_WEIGHTS.get(level)
+    if weights is None:
+        raise ValueError(f"No generator for level {level!r}")
+
+    rng = np.random.default_rng(seed)
+    codes = np.array([KIND_CODES[name] for name in weights], dtype=np.int8)
+    probabilities = np.array(list(weights.values()))
+    kinds = rng.choice(codes, size=n, p=probabilities / probabilities.sum())
+
+    params = np.zeros((n, MAX_PARAMS), dtype=np.int64)
+    numerators = np.zeros(n, dtype=np.int64)
+    denominators = np.zeros(n, dtype=np.int64)
+
+    for name in weights:
+        rows = np.flatnonzero(kinds == KIND_CODES[name])
+        if len(rows):
+            p = _KIND_BUILDERS[name](rng, len(rows))
+            num, den = kind_answers(name, p)
+            params[rows, :p.shape[1]] = p
+            numerators[rows] = num
+            if den is not None:
+                denominators[rows] = den
+
+    return ChallengeBatch(kinds, params, numerators, denominators)
+
+
+# --- Per-Kind Vectorized Builders ---
+# Each builder draws the parameter columns for m rows of its kind.
+
+def _columns(*arrays):
+    return np.stack(arrays, axis=1)
+
+def _remainder(rng, m):
+    return _columns(rng.integers(50, 301, m), rng.integers(2, 14, m))
+
+def _largest_prime_factor(rng, m):
+    p = rng.choice(PRIMES_FROM_13, m)
+    factor_count = rng.integers(1, 4, m)
+    factors = rng.choice(SMALL_PRIMES, (m, 3))
+    factors[np.arange(3) >= factor_count[:, None]] = 1
+    return _columns(p * factors.prod(axis=1), p)
+
+def _gcd_lcm_operands(rng, m):
+    a = rng.integers(5, 21, m) * rng.choice([2, 3, 5], m)
+    b = rng.integers(5, 21, m) * rng.choice([2, 3, 5], m)
+    return _columns(a, b)
+
+def _rectangle(rng, m):
+    return _columns(rng.integers(5, 16, m), rng.integers(3, 11, m))
+
+def _square(rng, m):
+    return _columns(rng.integers(4, 13, m))
+
+def _angle(rng, m):
+    return _columns(rng.integers(10, 81, m))
+
+def _scaled_triples(rng, m):
+    return PYTHAGOREAN_TRIPLES[rng.integers(0, len(PYTHAGOREAN_TRIPLES), m)] * rng.integers(1, 4, m)[:, None]
+
+def _leg_given_a(rng, m):
+    triples = _scaled_triples(rng, m)
+    return _columns(*triples.T, triples[:, 0])
+
+def _leg_given_b(rng, m):
+    triples = _scaled_triples(rng, m)
+    return _columns(*triples.T, triples[:, 1])
+
+def _linear_equation(rng, m):
+    a = rng.integers(2, 6, m)
+    b = rng.integers(-10, 11, m)
+    c = rng.integers(-20, 21, m)
+    c = np.where((c - b) % a != 0, a * rng.integers(-5, 6, m) + b, c)
+    return _columns(a, b, c)
+
+def _word_problem(rng, m):
+    return _columns(rng.integers(5, 16, m), rng.integers(2, 9, m))
+
+def _expression_eval(rng, m):
+    return _columns(rng.integers(0, len(EXPRESSION_VARS), m), rng.integers(2, 11, m),
+                    rng.integers(0, len(EXPRESSION_OPS), m), rng.integers(1, 6, m), rng.integers(1, 11, m))
+
+def _permutations(rng, m):
+    return _columns(rng.integers(3, 6, m))
+
+def _die_number(rng, m):
+    sides = rng.choice([4, 6, 8, 10], m)
+    return _columns(sides, rng.integers(1, sides + 1))
+
+def _die_sides(rng, m):
+    return _columns(rng.choice([4, 6, 8, 10], m))
+
+def _coin_flips(rng, m):
+    return _columns(rng.integers(2, 4, m))
+
+_KIND_BUILDERS = {
+    "remainder": _remainder,
+    "largest_prime_factor": _largest_prime_factor,
+    "gcd": _gcd_lcm_operands,
+    "lcm": _gcd_lcm_operands,
+    "rectangle_area": _rectangle,
+    "rectangle_perimeter": _rectangle,
+    "square_area": _square,
+    "square_perimeter": _square,
+    "complementary": _angle,
+    "supplementary": _angle,
+    "hypotenuse": _scaled_triples,
+    "leg_given_a": _leg_given_a,
+    "leg_given_b": _leg_given_b,
+    "linear_equation": _linear_equation,
+    "word_problem": _word_problem,
+    "expression_eval": _expression_eval,
+    "permutations": _permutations,
+    "die_number": _die_number,
+    "die_even": _die_sides,
+    "die_odd": _die_sides,
+    "coin_all_heads": _coin_flips,
+    "coin_all_tails": _coin_flips,
+    "coin_one_head": _coin_flips,
+}
+
+
+# --- Per-Kind Answers ---
+# Each function takes the (m, k) parameter columns of one kind and returns
+# (numerators, denominators); denominators is None for integer answers.
+
+def _expression_answer(p):
+    val, op, num1, num2 = p[:, 1], p[:, 2], p[:, 3], p[:, 4]
+    return np.select([op == 0, op == 1], [num1 * val + num2, num1 * val - num2], num1 * val * num2), None
+
+def _reduced(numerators, denominators):
+    g = np.gcd(numerators, denominators)
+    return numerators // g, denominators // g
+
+_KIND_ANSWERS = {
+    "remainder": lambda p: (p[:, 0] % p[:, 1], None),
+    "largest_prime_factor": lambda p: (p[:, 1], None),
+    "gcd": lambda p: (np.gcd(p[:, 0], p[:, 1]), None),
+    "lcm": lambda p: (np.lcm(p[:, 0], p[:, 1]), None),
+    "rectangle_area": lambda p: (p[:, 0] * p[:, 1], None),
+    "rectangle_perimeter": lambda p: (2 * (p[:, 0] + p[:, 1]), None),
+    "square_area": lambda p: (p[:, 0] * p[:, 0], None),
+    "square_perimeter": lambda p: (4 * p[:, 0], None),
+    "complementary": lambda p: (90 - p[:, 0], None),
+    "supplementary": lambda p: (180 - p[:, 0], None),
+    "hypotenuse": lambda p: (p[:, 2], None),
+    "leg_given_a": lambda p: (p[:, 1], None),
+    "leg_given_b": lambda p: (p[:, 0], None),
+    "linear_equation": lambda p: ((p[:, 2] - p[:, 1]) // p[:, 0], None),
+    "word_problem": lambda p: (p[:, 0] * p[:, 1], None),
+    "expression_eval": _expression_answer,
+    "permutations": lambda p: (FACTORIALS[p[:, 0]], None),
+    "die_number": lambda p: (np.ones(len(p), dtype=p.dtype), p[:, 0]),
+    "die_even": lambda p: _reduced(p[:, 0] // 2, p[:, 0]),
+    "die_odd": lambda p: _reduced((p[:, 0] + 1) // 2, p[:, 0]),
+    "coin_all_heads": lambda p: (np.ones(len(p), dtype=p.dtype), 2 ** p[:, 0]),
+    "coin_all_tails": lambda p: (np.ones(len(p), dtype=p.dtype), 2 ** p[:, 0]),
+    # Matches the scalar generator, which does not reduce n/2^n.
+    "coin_one_head": lambda p: (p[:, 0], 2 ** p[:, 0]),
+}
+
+
+def kind_answers(name, params):
+    return _KIND_ANSWERS[name](params)
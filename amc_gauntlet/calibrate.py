@@ -0,0 +1,129 @@
+"""Batch recalibration of item difficulty ratings.
+
+Meant to run nightly against a ``PlayerStore`` database. The store keeps a
+running ``answer_counts`` table with one row per (player, topic, difficulty),
+so the fit reads and costs time proportional to those pairs rather than to
+the length of the answer history. A Rasch model (one ability per player, one rating per
+(topic, difficulty) item) is then fitted to those counts by alternating
+damped Newton steps, each a handful of NumPy ``bincount`` passes. Weak
+normal priors keep players with perfect records finite. Ratings are shifted
+so the average medium item sits at 0, the scale ``amc_gauntlet.skill``
+assumes, and written to the ``item_ratings`` table; sessions pick them up
+the next time they start.
+
+    python -m amc_gauntlet.calibrate players.db
+"""
+import argparse
+import sqlite3
+import time
+
+import numpy as np
+
+from .playerstore import ensure_schema
+from .skill import DEFAULT_ITEM_RATINGS
+
+PRIOR_VARIANCE = 4.0
+MAX_STEP = 1.0
+
+_ANSWER_COUNTS = "SELECT player_id, topic, difficulty, answers, correct FROM answer_counts"
+_UPSERT_ITEM_RATING = """
+INSERT INTO item_ratings (topic, difficulty, rating, answers, updated_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (topic, difficulty) DO UPDATE SET
+    rating = excluded.rating, answers = excluded.answers, updated_at = excluded.updated_at
+"""
+
+
+def load_answer_counts(conn, chunk_size=100000):
+    # Returns (player codes, item codes, answers, correct, items) where items
+    # lists the (topic, difficulty) pair of each item code.
+    player_codes = {}
+    item_codes = {}
+    columns = ([], [], [], [])
+    cursor = conn.execute(_ANSWER_COUNTS)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        columns[0].append(np.array([player_codes.setdefault(row[0], len(player_codes)) for row in rows]))
+        columns[1].append(np.array([item_codes.setdefault((row[1], row[2]), len(item_codes)) for row in rows]))
+        columns[2].append(np.array([row[3] for row in rows], dtype=np.float64))
+        columns[3].append(np.array([row[4] for row in rows], dtype=np.float64))
+    if not player_codes:
+        return None
+    players, items, answers, correct = (np.concatenate(column) for column in columns)
+    return players, items, answers, correct, list(item_codes)
+
+
+def fit_ratings(players, items, answers, correct, prior_ratings, iterations=200, tolerance=1e-3):
+    num_players = int(players.max()) + 1
+    ability = np.zeros(num_players)
+    rating = prior_ratings.astype(np.float64)
+
+    for _ in range(iterations):
+        p = 1.0 / (1.0 + np.exp(rating[items] - ability[players]))
+        residual = correct - answers * p
+        weight = answers * p * (1.0 - p)
+        gradient = np.bincount(players, residual, num_players) - ability / PRIOR_VARIANCE
+        curvature = np.bincount(players, weight, num_players) + 1.0 / PRIOR_VARIANCE
+        ability_step = np.clip(gradient / curvature, -MAX_STEP, MAX_STEP)
+        ability += ability_step
+
+        p = 1.0 / (1.0 + np.exp(rating[items] - ability[players]))
+        residual = correct - answers * p
+        weight = answers * p * (1.0 - p)
+        gradient = -np.bincount(items, residual, len(rating)) - (rating - prior_ratings) / PRIOR_VARIANCE
+        curvature = np.bincount(items, weight, len(rating)) + 1.0 / PRIOR_VARIANCE
+        rating_step = np.clip(gradient / curvature, -MAX_STEP, MAX_STEP)
+        rating += rating_step
+
+        if max(np.abs(ability_step).max(), np.abs(rating_step).max()) < tolerance:
+            break
+    return ability, rating
+
+
+def recalibrate(path, min_answers=30):
+    conn = sqlite3.connect(path)
+    try:
+        ensure_schema(conn)
+        counts = load_answer_counts(conn)
+        if counts is None:
+            return {}
+        players, items, answers, correct, item_keys = counts
+        prior = np.array([DEFAULT_ITEM_RATINGS.get(difficulty, 0.0) for _, difficulty in item_keys])
+        _, rating = fit_ratings(players, items, answers, correct, prior)
+
+        medium = np.array([difficulty == "medium" for _, difficulty in item_keys])
+        if medium.any():
+            rating -= rating[medium].mean() # Average medium item at 0, the scale the online model assumes
+
+        item_answers = np.bincount(items, answers, len(item_keys))
+        now = time.time()
+        results = {}
+        rows = []
+        for (topic, difficulty), value, count in zip(item_keys, rating.tolist(), item_answers.tolist()):
+            if count >= min_answers: # Too few answers: keep the default rating
+                results[(topic, difficulty)] = value
+                rows.append((topic, difficulty, value, int(count), now))
+        with conn:
+            conn.executemany(_UPSERT_ITEM_RATING, rows)
+        return results
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refit item difficulty ratings from the answer history.")
+    parser.add_argument("db")
+    parser.add_argument("--min-answers", type=int, default=30,
+                        help="answers an item needs before its rating is replaced")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = recalibrate(args.db, args.min_answers)
+    for (topic, difficulty), value in sorted(results.items()):
+        print(f"{topic:<24} {difficulty:<7} {value:+.2f}")
+    print(f"{len(results)} items rated in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
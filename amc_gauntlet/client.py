@@ -0,0 +1,90 @@
+"""Blocking client for the challenge server.
+
+``RemoteSession`` mirrors the ``GameSession`` interface so the pygame front
+end can run against a local session or a server without caring which. The
+player and challenge it exposes are local copies kept in sync from the
+``state`` returned with every reply; the correct answer never leaves the
+server until it is revealed in the feedback message.
+"""
+import json
+import socket
+
+from .engine import Challenge, Player
+from .session import SessionError
+
+
+class RemoteSession:
+    def __init__(self, host, port, name, timeout=10):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile("rwb")
+        self.player = Player(name)
+        self.current_challenge = None
+        self.answer_submitted = False
+        self.hint_message = ""
+        self._mastery = 0.5
+        self._can_advance = False
+        self._request("hello", name=name)
+
+    def _request(self, op, **fields):
+        self._file.write(json.dumps({"op": op, **fields}).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise SessionError(reply.get("error", "Request failed"))
+        if "state" in reply:
+            self._apply_state(reply["state"])
+        return reply
+
+    def _apply_state(self, state):
+        self.player.update_from_dict(state["player"])
+        self.answer_submitted = state["answer_submitted"]
+        self.hint_message = state["hint"]
+        self._mastery = state["mastery"]
+        self._can_advance = state["can_advance"]
+
+        data = state["challenge"]
+        if data is None:
+            self.current_challenge = None
+            return
+        challenge = self.current_challenge
+        if challenge is None or challenge.question != data["question"] or challenge.topic != data["topic"]:
+            # The answer stays on the server; only the question is mirrored.
+            challenge = Challenge(data["level"], data["topic"], data["question"], "", data["skill_token"], data["difficulty"])
+            self.current_challenge = challenge
+        challenge.hint_given = data["hint_given"]
+
+    def mastery(self):
+        return self._mastery
+
+    def can_advance(self):
+        return self._can_advance
+
+    def start_challenge(self):
+        self.current_challenge = None # Always take the server's new challenge, even if the text repeats
+        self._request("challenge")
+        return self.current_challenge
+
+    def leave_challenge(self):
+        self._request("leave")
+
+    def submit(self, text):
+        reply = self._request("answer", text=text)
+        return reply["correct"], reply["feedback"]
+
+    def use_hint(self):
+        return self._request("hint")["hint"]
+
+    def advance_level(self):
+        reply = self._request("next_level")
+        return reply["result"], reply["message"]
+
+    def close(self):
+        try:
+            self._request("bye")
+        except (OSError, ValueError, SessionError):
+            pass
+        self._file.close()
+        self._sock.close()
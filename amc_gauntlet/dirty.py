@@ -0,0 +1,94 @@
+"""Dirty-rectangle bookkeeping for the pygame front end.
+
+Each widget is drawn under a stable key together with the rect it covers and a
+small hashable ``state`` describing how it looks (its text, colors, hover flag,
+cursor phase, ...). A widget is only repainted when its state or rect changed
+since the previous frame, and only the areas that were repainted are pushed to
+the display. A full redraw happens after ``invalidate()`` (state transitions,
+window exposure) or when the screen background changes.
+
+Things blitted over the widgets without being one (the profiler overlay) push
+their area with ``mark_dirty()``; when they move off an area they call
+``expose()`` and on the next frame the area is cleared and every widget
+overlapping it repaints.
+"""
+import pygame
+
+_EXPOSED = object() # Widget state that never matches, forcing a repaint
+
+
+class DirtyRenderer:
+    def __init__(self):
+        self.surface = None
+        self.background = None
+        self._widgets = {} # key -> (rect, state) as last drawn
+        self._seen = set() # keys touched during the current frame
+        self._dirty = []
+        self._exposed = [] # Areas to clear and repaint at the next begin()
+        self._full_redraw = True
+        self._drawn = False # begin() was called during the current frame
+
+    @property
+    def full_redraw(self):
+        return self._full_redraw
+
+    def invalidate(self):
+        self._full_redraw = True
+
+    def begin(self, surface, background):
+        if background != self.background:
+            self._full_redraw = True
+        self.surface = surface
+        self.background = background
+        self._drawn = True
+        if self._full_redraw:
+            surface.fill(background)
+            self._widgets.clear()
+        else:
+            for area in self._exposed:
+                surface.fill(background, area)
+                self._dirty.append(area)
+                for key, (rect, _) in self._widgets.items():
+                    if rect.colliderect(area):
+                        self._widgets[key] = (rect, _EXPOSED)
+        self._exposed.clear()
+
+    def expose(self, rect):
+        self._exposed.append(pygame.Rect(rect))
+
+    def mark_dirty(self, rect):
+        if not self._full_redraw:
+            self._dirty.append(pygame.Rect(rect))
+
+    def needs_draw(self, key, rect, state=None):
+        rect = pygame.Rect(rect)
+        self._seen.add(key)
+        previous = self._widgets.get(key)
+        if previous is not None and previous[0] == rect and previous[1] == state:
+            return False
+
+        self._widgets[key] = (rect, state)
+        if not self._full_redraw:
+            area = rect if previous is None else rect.union(previous[0])
+            self.surface.fill(self.background, area)
+            self._dirty.append(area)
+        return True
+
+    def present(self):
+        if not self._drawn:
+            return # Nothing was drawn; keep any pending full redraw for the next frame
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        else:
+            # Erase widgets that were not drawn this frame (e.g. a feedback
+            # line that went away).
+            for key in [key for key in self._widgets if key not in self._seen]:
+                rect, _ = self._widgets.pop(key)
+                self.surface.fill(self.background, rect)
+                self._dirty.append(rect)
+            if self._dirty:
+                pygame.display.update(self._dirty)
+        self._dirty.clear()
+        self._seen.clear()
+        self._drawn = False
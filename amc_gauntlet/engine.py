@@ -0,0 +1,486 @@
+"""Pure-Python game engine for AMC 8 Gauntlet.
+
+Everything in here is free of pygame so the generators, hints and answer
+checking can be used from batch jobs and servers without opening a window.
+The built-in levels are registered with ``amc_gauntlet.plugins.registry``;
+topic packs add theirs through ``registry.load_packs()``.
+"""
+import random
+from math import gcd, factorial
+
+from .answers import check_answer # Answer checking lives in its own module; re-exported here
+from .hints import HINT_BUILDERS, generate_hint # Likewise for hint building
+from .plugins import registry
+from .sampling import AliasSampler
+
+# --- Game Data ---
+# Level names in play order, built-in and from packs. The registry keeps this
+# list up to date in place, so it can be imported like a constant.
+LEVELS = registry.levels
+
+# Parameter ranges for each difficulty. "medium" is the original game; easy
+# only changes operand sizes. Hard Number Theory also asks for the largest
+# prime factor of larger numbers (built and checked with the sieve in
+# amc_gauntlet.numtheory, with every factor small enough to find by hand) and
+# adds divisor counting questions; hard Pythagorean problems use every triple in
+# amc_gauntlet.triples up to a hypotenuse bound.
+DIFFICULTIES = ("easy", "medium", "hard")
+DIFFICULTY_SETTINGS = {
+    "easy": {
+        "number_theory_types": ["divisibility", "prime", "gcd_lcm"],
+        "remainder_num": (10, 60), "divisors": [2, 3, 4, 5, 10],
+        "prime_factor_count": (1, 1),
+        "gcd_base": (2, 10), "gcd_multipliers": [2, 3, 5],
+        "rect_length": (2, 9), "rect_width": (2, 6), "square_side": (2, 9),
+        "angle": (10, 80), "triple_multiplier": (1, 1),
+        "linear_a": (2, 3), "linear_b": (-5, 5), "linear_c": (-10, 10), "linear_fallback": (-3, 3),
+        "items": (2, 10), "item_cost": (1, 5),
+        "expr_val": (2, 5), "expr_num1": (1, 3), "expr_num2": (1, 5),
+        "arrangement_items": (3, 4), "die_sides": [4, 6], "coin_flips": (2, 2),
+    },
+    "medium": {
+        "number_theory_types": ["divisibility", "prime", "gcd_lcm"],
+        "remainder_num": (50, 300), "divisors": [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13],
+        "prime_factor_count": (1, 3),
+        "gcd_base": (5, 20), "gcd_multipliers": [2, 3, 5],
+        "rect_length": (5, 15), "rect_width": (3, 10), "square_side": (4, 12),
+        "angle": (10, 80), "triple_multiplier": (1, 3),
+        "linear_a": (2, 5), "linear_b": (-10, 10), "linear_c": (-20, 20), "linear_fallback": (-5, 5),
+        "items": (5, 15), "item_cost": (2, 8),
+        "expr_val": (2, 10), "expr_num1": (1, 5), "expr_num2": (1, 10),
+        "arrangement_items": (3, 5), "die_sides": [4, 6, 8, 10], "coin_flips": (2, 3),
+    },
+    "hard": {
+        "number_theory_types": ["divisibility", "prime", "gcd_lcm", "divisor_count", "divisor_sum"],
+        "remainder_num": (300, 2000), "divisors": [7, 9, 11, 12, 13, 15, 17, 19],
+        "prime_factor_count": (2, 4),
+        "large_number": (10 ** 4, 10 ** 6), "large_number_max_prime": 199, # Largest prime factor questions
+        "divisor_number": (1000, 10 ** 6), "divisor_max_prime": 97, # Numbers that factor by hand
+        "gcd_base": (12, 60), "gcd_multipliers": [2, 3, 5, 7],
+        "rect_length": (12, 40), "rect_width": (8, 30), "square_side": (11, 30),
+        "angle": (1, 89), "triple_max_hypotenuse": 2500,
+        "linear_a": (3, 9), "linear_b": (-30, 30), "linear_c": (-60, 60), "linear_fallback": (-8, 8),
+        "items": (12, 40), "item_cost": (6, 25),
+        "expr_val": (5, 20), "expr_num1": (2, 12), "expr_num2": (3, 20),
+        "arrangement_items": (5, 7), "die_sides": [8, 10, 12, 20], "coin_flips": (3, 4),
+    },
+}
+
+# Question kinds of each built-in level and the topics they produce. A session
+# picks the kind for every challenge, weak topics more often (see
+# amc_gauntlet.skill.TopicMixer); without one the generator draws it uniformly.
+NUMBER_THEORY_KINDS = {
+    "divisibility": ("Modular Arithmetic",), "prime": ("Prime Factors",),
+    "gcd_lcm": ("GCD Calculation", "LCM Calculation"),
+    "divisor_count": ("Number of Divisors",), "divisor_sum": ("Sum of Divisors",),
+}
+GEOMETRY_KINDS = {
+    "area_perimeter": ("Area/Perimeter",), "angles": ("Angle Relationships",),
+    "pythagorean": ("Pythagorean Theorem",),
+}
+ALGEBRA_KINDS = {
+    "linear_equation": ("Linear Equations",), "simple_word_problem": ("Word Problems",),
+    "expression_eval": ("Expression Evaluation",),
+}
+COUNTING_KINDS = {
+    "counting_arrangements": ("Permutations",), "probability_die": ("Die Probability",),
+    "probability_coin": ("Coin Probability",),
+}
+_NUMBER_THEORY_KINDS_BY_DIFFICULTY = {
+    difficulty: {kind: NUMBER_THEORY_KINDS[kind] for kind in settings["number_theory_types"]}
+    for difficulty, settings in DIFFICULTY_SETTINGS.items()
+}
+
+# Uniform samplers for the generators' question kinds, built once instead of a list per call.
+_NUMBER_THEORY_SAMPLERS = {difficulty: AliasSampler(settings["number_theory_types"])
+                           for difficulty, settings in DIFFICULTY_SETTINGS.items()}
+_GEOMETRY_SAMPLER = AliasSampler(GEOMETRY_KINDS)
+_ALGEBRA_SAMPLER = AliasSampler(ALGEBRA_KINDS)
+_COUNTING_SAMPLER = AliasSampler(COUNTING_KINDS)
+_pinnacle_sampler = ((), None) # (pinnacle levels it was built for, sampler)
+
+# --- Classes ---
+class Challenge:
+    __slots__ = ("level", "topic", "question", "answer", "skill_token", "difficulty", "params", "hint_given", "hint")
+
+    def __init__(self, level, topic, question, answer, skill_token, difficulty="medium", params=None):
+        self.level = level
+        self.topic = topic
+        self.question = question
+        self.answer = str(answer)
+        self.skill_token = skill_token
+        self.difficulty = difficulty
+        self.params = params # Generator parameters, used to build hints without re-parsing the question
+        self.hint_given = False # New flag to track if hint has been given for this challenge
+        self.hint = None # Pre-built hint text, filled in by the prefetcher
+
+class Player:
+    __slots__ = ("name", "current_level_idx", "skill_tokens", "power_ups", "level_progress", "correct_streak", "skill_ratings",
+                 "reviews")
+
+    def __init__(self, name):
+        self.name = name
+        self.current_level_idx = 0
+        self.skill_tokens = {}
+        self.power_ups = {"Hint Helper": 1, "Double Check": 1}
+        self.level_progress = {level: False for level in LEVELS}
+        self.correct_streak = 0
+        self.skill_ratings = {} # Topic or level -> [ability, answers]; see amc_gauntlet.skill
+        self.reviews = {} # Level -> heap of missed challenges to ask again; see amc_gauntlet.review
+
+    def get_current_level_name(self):
+        return LEVELS[self.current_level_idx]
+
+    def add_skill_token(self, token_name):
+        self.skill_tokens[token_name] = self.skill_tokens.get(token_name, 0) + 1
+
+    def use_power_up(self, power_up_name):
+        if self.power_ups.get(power_up_name, 0) > 0:
+            self.power_ups[power_up_name] -= 1
+            return True
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "current_level_idx": self.current_level_idx,
+            "skill_tokens": dict(self.skill_tokens),
+            "power_ups": dict(self.power_ups),
+            "level_progress": dict(self.level_progress),
+            "correct_streak": self.correct_streak,
+            "skill_ratings": {name: list(rating) for name, rating in self.skill_ratings.items()},
+            "reviews": {level: [list(entry) for entry in heap] for level, heap in self.reviews.items() if heap},
+        }
+
+    def update_from_dict(self, data):
+        self.skill_tokens = dict(data["skill_tokens"])
+        self.power_ups = dict(data["power_ups"])
+        self.level_progress.update(data["level_progress"])
+        # Installing or removing a pack shifts level indexes, so the current
+        # level is the first one not yet passed (the last one once all are).
+        self.current_level_idx = next((i for i, level in enumerate(LEVELS) if not self.level_progress.get(level)),
+                                      len(LEVELS) - 1)
+        self.correct_streak = data["correct_streak"]
+        self.skill_ratings = {name: list(rating) for name, rating in data.get("skill_ratings", {}).items()}
+        self.reviews = {level: [list(entry) for entry in heap] for level, heap in data.get("reviews", {}).items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        player = cls(data["name"])
+        player.update_from_dict(data)
+        return player
+
+# --- Dynamic Question Generation Functions ---
+
+def generate_number_theory_challenge(difficulty="medium", kind=None):
+    settings = DIFFICULTY_SETTINGS[difficulty]
+    q_type = kind or _NUMBER_THEORY_SAMPLERS[difficulty].sample()
+    
+    if q_type == "divisibility":
+        num = random.randint(*settings["remainder_num"])
+        divisor = random.choice(settings["divisors"])
+        question = f"What is the remainder when {num} is divided by {divisor}?"
+        answer = num % divisor
+        params = {"num": num, "divisor": divisor}
+        return Challenge("Number Theory Nexus", "Modular Arithmetic", question, answer, "Number Sense Navigator", difficulty, params)
+    
+    elif q_type == "prime" and "large_number" in settings:
+        from .numtheory import largest_prime_factor, primes_up_to # Imported on first use
+        # The answer p times a cofactor with no prime factor above p, so the
+        # number can be broken down by trial division by hand.
+        low, high = settings["large_number"]
+        p = random.choice(primes_up_to(settings["large_number_max_prime"])[5:]) # 13 onwards, like medium
+        while True:
+            cofactor = random.randint(-(-low // p), high // p)
+            if largest_prime_factor(cofactor) <= p:
+                break
+        composite_num = p * cofactor
+        question = f"What is the largest prime factor of {composite_num}?"
+        params = {"num": composite_num, "p": p}
+        return Challenge("Number Theory Nexus", "Prime Factors", question, p, "Number Sense Navigator", difficulty, params)
+
+    elif q_type == "prime":
+        primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79, 83, 89, 97]
+        p = random.choice(primes[5:]) # Pick a prime from 13 onwards
+        
+        factor_count = random.randint(*settings["prime_factor_count"])
+        composite_num = p
+        for _ in range(factor_count):
+            small_prime_factors = [pr for pr in primes if pr < p and pr <= 7]
+            if small_prime_factors:
+                composite_num *= random.choice(small_prime_factors)
+            else:
+                composite_num *= random.choice([2,3,5]) # Fallback for very small 'p'
+
+        question = f"What is the largest prime factor of {composite_num}?"
+        answer = p
+        params = {"num": composite_num, "p": p}
+        return Challenge("Number Theory Nexus", "Prime Factors", question, answer, "Number Sense Navigator", difficulty, params)
+
+    elif q_type == "gcd_lcm":
+        a = random.randint(*settings["gcd_base"]) * random.choice(settings["gcd_multipliers"])
+        b = random.randint(*settings["gcd_base"]) * random.choice(settings["gcd_multipliers"])
+        
+        op = random.choice(["GCD", "LCM"])
+        if op == "GCD":
+            question = f"What is the Greatest Common Divisor (GCD) of {a} and {b}?"
+            answer = gcd(a, b)
+        else:
+            question = f"What is the Least Common Multiple (LCM) of {a} and {b}?"
+            answer = abs(a*b) // gcd(a,b)
+        params = {"a": a, "b": b}
+        return Challenge("Number Theory Nexus", f"{op} Calculation", question, answer, "Number Sense Navigator", difficulty, params)
+
+    elif q_type in ("divisor_count", "divisor_sum"):
+        from .numtheory import divisor_count, divisor_sum, factorize
+        # Redraw until the number has at least 4 prime factors, all small enough to find by hand.
+        while True:
+            num = random.randint(*settings["divisor_number"])
+            factors = factorize(num)
+            if factors[-1][0] <= settings["divisor_max_prime"] and sum(e for _, e in factors) >= 4:
+                break
+        if q_type == "divisor_count":
+            question = f"How many positive divisors does {num} have?"
+            answer = divisor_count(num)
+            topic = "Number of Divisors"
+        else:
+            question = f"What is the sum of all positive divisors of {num}?"
+            answer = divisor_sum(num)
+            topic = "Sum of Divisors"
+        params = {"num": num, "factors": "·".join(f"{p}^{e}" if e > 1 else str(p) for p, e in factors)}
+        return Challenge("Number Theory Nexus", topic, question, answer, "Number Sense Navigator", difficulty, params)
+    
+    return Challenge("Number Theory Nexus", "Default", "What is 1 + 1?", 2, "Number Sense Navigator")
+
+def generate_geometry_challenge(difficulty="medium", kind=None):
+    settings = DIFFICULTY_SETTINGS[difficulty]
+    q_type = kind or _GEOMETRY_SAMPLER.sample()
+
+    if q_type == "area_perimeter":
+        shape = random.choice(["rectangle", "square"])
+        if shape == "rectangle":
+            length = random.randint(*settings["rect_length"])
+            width = random.randint(*settings["rect_width"])
+            metric = random.choice(["area", "perimeter"])
+            if metric == "area":
+                question = f"A rectangle has length {length} and width {width}. What is its area?"
+                answer = length * width
+            else:
+                question = f"A rectangle has length {length} and width {width}. What is its perimeter?"
+                answer = 2 * (length + width)
+            params = {"shape": shape, "metric": metric, "length": length, "width": width}
+            return Challenge("Geometry Gymnasium", "Area/Perimeter", question, answer, "Geometric Intuition", difficulty, params)
+        else: # square
+            side = random.randint(*settings["square_side"])
+            metric = random.choice(["area", "perimeter"])
+            if metric == "area":
+                question = f"A square has a side length of {side}. What is its area?"
+                answer = side * side
+            else:
+                question = f"A square has a side length of {side}. What is its perimeter?"
+                answer = 4 * side
+            params = {"shape": shape, "metric": metric, "side": side}
+            return Challenge("Geometry Gymnasium", "Area/Perimeter", question, answer, "Geometric Intuition", difficulty, params)
+
+    elif q_type == "angles":
+        angle = random.randint(*settings["angle"])
+        op = random.choice(["complementary", "supplementary"])
+        if op == "complementary":
+            question = f"Two angles are complementary. One angle is {angle} degrees. What is the other angle?"
+            answer = 90 - angle
+        else:
+            question = f"Two angles are supplementary. One angle is {angle} degrees. What is the other angle?"
+            answer = 180 - angle
+        params = {"relation": op, "angle": angle}
+        return Challenge("Geometry Gymnasium", "Angle Relationships", question, answer, "Geometric Intuition", difficulty, params)
+
+    elif q_type == "pythagorean" and "triple_max_hypotenuse" in settings:
+        from .triples import get_index # Imported and built on first use
+        index = get_index(settings["triple_max_hypotenuse"])
+        missing = random.choice(["hypotenuse", "leg", "count"])
+        if missing == "count":
+            leg = random.choice(index.complete_legs)
+            question = f"How many right triangles with whole-number side lengths have a leg of length {leg}?"
+            answer = index.count_with_leg(leg)
+            params = {"missing": missing, "leg": leg}
+        else:
+            i = index.sample()
+            a, b, c = index[i]
+            if random.random() < 0.5:
+                a, b = b, a
+            params = {"missing": missing, "a": a, "b": b, "c": c, "scale": index.scale[i],
+                      "primitive": "-".join(map(str, index.primitive_triple(i)))}
+            if missing == "hypotenuse":
+                question = f"A right triangle has legs of length {a} and {b}. What is the length of the hypotenuse?"
+                answer = c
+            else:
+                question = f"A right triangle has a hypotenuse of {c} and one leg of {a}. What is the length of the other leg?"
+                answer = b
+                params["leg"] = a
+        return Challenge("Geometry Gymnasium", "Pythagorean Theorem", question, answer, "Geometric Intuition", difficulty, params)
+
+    elif q_type == "pythagorean":
+        triples = [(3, 4, 5), (5, 12, 13), (8, 15, 17), (7, 24, 25)]
+        a, b, c = random.choice(triples)
+        multiplier = random.randint(*settings["triple_multiplier"])
+        a *= multiplier
+        b *= multiplier
+        c *= multiplier
+
+        missing = random.choice(["hypotenuse", "leg"])
+        if missing == "hypotenuse":
+            question = f"A right triangle has legs of length {a} and {b}. What is the length of the hypotenuse?"
+            answer = c
+            params = {"missing": missing, "a": a, "b": b, "c": c}
+        else:
+            if random.random() < 0.5:
+                question = f"A right triangle has a hypotenuse of {c} and one leg of {a}. What is the length of the other leg?"
+                answer = b
+                params = {"missing": missing, "a": a, "b": b, "c": c, "leg": a}
+            else:
+                question = f"A right triangle has a hypotenuse of {c} and one leg of {b}. What is the length of the other leg?"
+                answer = a
+                params = {"missing": missing, "a": a, "b": b, "c": c, "leg": b}
+        return Challenge("Geometry Gymnasium", "Pythagorean Theorem", question, answer, "Geometric Intuition", difficulty, params)
+
+    return Challenge("Geometry Gymnasium", "Default", "What is the area of a triangle with base 4 and height 5?", 10, "Geometric Intuition")
+
+def generate_algebra_challenge(difficulty="medium", kind=None):
+    settings = DIFFICULTY_SETTINGS[difficulty]
+    q_type = kind or _ALGEBRA_SAMPLER.sample()
+
+    if q_type == "linear_equation":
+        a = random.randint(*settings["linear_a"])
+        b = random.randint(*settings["linear_b"])
+        c = random.randint(*settings["linear_c"])
+        if (c - b) % a != 0:
+            c = a * (random.randint(*settings["linear_fallback"])) + b
+        question = f"Solve for x: {a}x + {b} = {c}"
+        answer = (c - b) // a
+        params = {"a": a, "b": b, "c": c}
+        return Challenge("Algebra Arena", "Linear Equations", question, answer, "Algebra Alchemist", difficulty, params)
+
+    elif q_type == "simple_word_problem":
+        num_items = random.randint(*settings["items"])
+        cost_per_item = random.randint(*settings["item_cost"])
+        total_cost = num_items * cost_per_item
+        question = f"John bought {num_items} apples, each costing ${cost_per_item}. How much did he pay in total?"
+        answer = total_cost
+        params = {"num_items": num_items, "cost_per_item": cost_per_item}
+        return Challenge("Algebra Arena", "Word Problems", question, answer, "Algebra Alchemist", difficulty, params)
+
+    elif q_type == "expression_eval":
+        var = random.choice(['x', 'a', 'y'])
+        val = random.randint(*settings["expr_val"])
+        op = random.choice(['+', '-', '*'])
+        num1 = random.randint(*settings["expr_num1"])
+        num2 = random.randint(*settings["expr_num2"])
+
+        question = f"If {var} = {val}, what is {num1}{var} {op} {num2}?"
+        if op == '+':
+            answer = num1 * val + num2
+        elif op == '-':
+            answer = num1 * val - num2
+        else: # '*'
+            answer = num1 * val * num2
+        params = {"var": var, "val": val, "op": op, "num1": num1, "num2": num2}
+        return Challenge("Algebra Arena", "Expression Evaluation", question, answer, "Algebra Alchemist", difficulty, params)
+
+    return Challenge("Algebra Arena", "Default", "If x = 5, what is 2x + 3?", 13, "Algebra Alchemist")
+
+def generate_counting_probability_challenge(difficulty="medium", kind=None):
+    settings = DIFFICULTY_SETTINGS[difficulty]
+    q_type = kind or _COUNTING_SAMPLER.sample()
+
+    if q_type == "counting_arrangements":
+        num_items = random.randint(*settings["arrangement_items"])
+        question = f"How many ways can {num_items} distinct items be arranged in a line?"
+        answer = factorial(num_items)
+        params = {"num_items": num_items}
+        return Challenge("Counting & Probability Citadel", "Permutations", question, answer, "Combinatorics Commander", difficulty, params)
+
+    elif q_type == "probability_die":
+        die_sides = random.choice(settings["die_sides"])
+        target_type = random.choice(["number", "even", "odd"])
+        
+        if target_type == "number":
+            target = random.randint(1, die_sides)
+            question = f"What is the probability of rolling a {target} on a {die_sides}-sided die?"
+            answer = f"1/{die_sides}"
+        elif target_type == "even":
+            even_count = die_sides // 2
+            question = f"What is the probability of rolling an even number on a {die_sides}-sided die?"
+            g = gcd(even_count, die_sides)
+            answer = f"{even_count//g}/{die_sides//g}"
+        else: # odd
+            odd_count = (die_sides + 1) // 2
+            question = f"What is the probability of rolling an odd number on a {die_sides}-sided die?"
+            g = gcd(odd_count, die_sides)
+            answer = f"{odd_count//g}/{die_sides//g}"
+
+        params = {"die_sides": die_sides, "target_type": target_type}
+        if target_type == "number":
+            params["target"] = target
+        return Challenge("Counting & Probability Citadel", "Die Probability", question, answer, "Probability Prophet", difficulty, params)
+
+    elif q_type == "probability_coin":
+        num_flips = random.randint(*settings["coin_flips"])
+        event = random.choice(["all heads", "all tails", "exactly one head"])
+        
+        if event == "all heads":
+            question = f"If you flip a fair coin {num_flips} times, what is the probability of getting all heads?"
+            answer = f"1/{2**num_flips}"
+        elif event == "all tails":
+            question = f"If you flip a fair coin {num_flips} times, what is the probability of getting all tails?"
+            answer = f"1/{2**num_flips}"
+        else: # exactly one head
+            question = f"If you flip a fair coin {num_flips} times, what is the probability of getting exactly one head?"
+            answer = f"{num_flips}/{2**num_flips}"
+
+        params = {"num_flips": num_flips, "event": event}
+        return Challenge("Counting & Probability Citadel", "Coin Probability", question, answer, "Probability Prophet", difficulty, params)
+
+    return Challenge("Counting & Probability Citadel", "Default", "What is the probability of picking a red card from a standard deck of 52 cards?", "1/2", "Probability Prophet")
+
+def generate_pinnacle_challenge(difficulty="medium", kind=None):
+    # The kind is the level to draw from. Only the chosen level's generator is loaded.
+    global _pinnacle_sampler
+    level = kind
+    if level is None:
+        levels, sampler = _pinnacle_sampler
+        if levels is not registry.pinnacle_levels(): # A pack registered a level since
+            levels = registry.pinnacle_levels()
+            sampler = AliasSampler(levels)
+            _pinnacle_sampler = (levels, sampler)
+        level = sampler.sample()
+    return registry.generator(level)(difficulty)
+
+def pinnacle_kinds(difficulty="medium"):
+    # Every Pinnacle level is one kind, covering all of that level's topics.
+    kinds = {}
+    for level in registry.pinnacle_levels():
+        topics = [topic for level_topics in registry.kinds(level, difficulty).values() for topic in level_topics]
+        kinds[level] = tuple(dict.fromkeys(topics)) or (level,)
+    return kinds
+
+# --- Built-in Levels ---
+# map_rect is the level's button on the level map.
+registry.register("Number Theory Nexus", generate_number_theory_challenge, order=100, pinnacle=True,
+                  hint_builders=HINT_BUILDERS, map_rect=(50, 150, 280, 100),
+                  kinds=_NUMBER_THEORY_KINDS_BY_DIFFICULTY.__getitem__)
+registry.register("Geometry Gymnasium", generate_geometry_challenge, order=200, pinnacle=True,
+                  map_rect=(360, 150, 280, 100), kinds=lambda difficulty: GEOMETRY_KINDS)
+registry.register("Algebra Arena", generate_algebra_challenge, order=300, pinnacle=True,
+                  map_rect=(670, 150, 280, 100), kinds=lambda difficulty: ALGEBRA_KINDS)
+registry.register("Counting & Probability Citadel", generate_counting_probability_challenge, order=400, pinnacle=True,
+                  map_rect=(180, 350, 330, 100), kinds=lambda difficulty: COUNTING_KINDS)
+registry.register("Problem-Solving Pinnacle", generate_pinnacle_challenge, order=1000,
+                  map_rect=(540, 350, 280, 100), kinds=pinnacle_kinds)
+
+def generate_challenge_for_level(level_name, difficulty="medium", kind=None):
+    # kind is one of registry.kinds(level_name, difficulty), or None for the generator's own mix.
+    generator = registry.generator(level_name)
+    if generator:
+        return generator(difficulty) if kind is None else generator(difficulty, kind)
+    else:
+        return Challenge(level_name, "Error", "Error: No generator for this level.", "0", "Bug Finder")
@@ -0,0 +1,272 @@
+"""Append-only binary event log and headless replay.
+
+A log is a magic string followed by records, each a 7-byte header
+(milliseconds since the session began as u32, event type as u8, payload
+length as u16) and a payload. A ``BEGIN`` record starts every recorded
+session and carries its RNG seed, so one file can hold many sessions
+appended one after another.
+
+The front end records screen changes and raw key/mouse input; a
+``GameSession`` records session start (the player and the item ratings its
+skill model uses), every challenge served (with its topic, difficulty and
+params, and whether it was a review), submissions with their outcome, hints,
+level advances and leaving a challenge. Challenges are logged in full
+because the prefetch thread and seen-set redraws make the RNG stream depend
+on timing.
+
+Writing only packs a few bytes into a buffered file when something happens,
+so frames with no events cost nothing. ``replay()`` maps a log with
+``mmap`` and drives fresh ``GameSession`` objects through it as fast as
+possible, checking every recorded outcome, which makes recorded sessions
+usable as benchmarks and regression tests:
+
+    python -m amc_gauntlet.eventlog replay session.log --repeat 20
+    python -m amc_gauntlet.eventlog dump session.log
+"""
+import argparse
+import json
+import mmap
+import random
+import struct
+import time
+
+from .engine import Challenge, Player
+from .plugins import registry
+
+MAGIC = b"AMCLOG01"
+_RECORD = struct.Struct("<IBH")
+_BEGIN = struct.Struct("<Qd") # seed, wall-clock start time
+MAX_SEED = (1 << 64) - 1
+_KEY = struct.Struct("<i")
+_CLICK = struct.Struct("<hhB")
+
+# Event types
+BEGIN = 0
+STATE = 1
+KEY = 2
+CLICK = 3
+START = 4
+CHALLENGE = 5
+SUBMIT = 6
+HINT = 7
+ADVANCE = 8
+LEAVE = 9
+EVENT_NAMES = ["BEGIN", "STATE", "KEY", "CLICK", "START", "CHALLENGE", "SUBMIT", "HINT", "ADVANCE", "LEAVE"]
+
+ADVANCE_RESULTS = ["advanced", "won", "locked"]
+MAX_PAYLOAD = 0xFFFF
+
+
+class EventLog:
+    def __init__(self, path, seed):
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(f"Seed {seed} is not in 0..{MAX_SEED}")
+        self.seed = seed
+        self._file = open(path, "ab", buffering=1 << 16)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._start = time.perf_counter()
+        self._write(BEGIN, _BEGIN.pack(seed, time.time()))
+
+    def _write(self, event, payload=b""):
+        if len(payload) > MAX_PAYLOAD:
+            # A cut record would only fail later, in replay.
+            raise ValueError(f"{EVENT_NAMES[event]} record of {len(payload)} bytes is over {MAX_PAYLOAD}")
+        elapsed_ms = int((time.perf_counter() - self._start) * 1000) & 0xFFFFFFFF
+        self._file.write(_RECORD.pack(elapsed_ms, event, len(payload)) + payload)
+
+    # --- Front end events ---
+
+    def state(self, state):
+        self._write(STATE, bytes((state,)))
+
+    def key(self, key, text=""):
+        self._write(KEY, _KEY.pack(key) + text.encode("utf-8"))
+
+    def click(self, pos, button=1):
+        self._write(CLICK, _CLICK.pack(pos[0], pos[1], button))
+
+    # --- Session events ---
+
+    def start(self, player, item_ratings=None):
+        # The player's state as the session began (it may have been loaded from a save)
+        # and the item ratings its skill model uses, which calibration changes.
+        player = player.to_dict()
+        del player["reviews"] # Replay serves reviews from the log; the queue could outgrow a record
+        data = {
+            "player": player,
+            "item_ratings": [[topic, difficulty, rating] for (topic, difficulty), rating in (item_ratings or {}).items()],
+        }
+        self._write(START, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def challenge(self, challenge, review_level=None):
+        # review_level is the level a review is filed under, None for fresh challenges.
+        data = {
+            "level": challenge.level,
+            "topic": challenge.topic,
+            "question": challenge.question,
+            "answer": challenge.answer,
+            "skill_token": challenge.skill_token,
+            "difficulty": challenge.difficulty,
+            "params": challenge.params,
+        }
+        if review_level is not None:
+            data["review"] = review_level
+        self._write(CHALLENGE, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def submit(self, text, correct):
+        self._write(SUBMIT, bytes((int(correct),)) + text.encode("utf-8"))
+
+    def hint(self, hint):
+        self._write(HINT, (hint or "").encode("utf-8"))
+
+    def advance(self, result):
+        self._write(ADVANCE, bytes((ADVANCE_RESULTS.index(result),)))
+
+    def leave(self):
+        self._write(LEAVE)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_events(buffer):
+    # Yields (elapsed_ms, event, payload bytes) for every record in buffer.
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an event log")
+    offset = len(MAGIC)
+    end = len(buffer)
+    while offset + _RECORD.size <= end:
+        elapsed_ms, event, length = _RECORD.unpack_from(buffer, offset)
+        offset += _RECORD.size
+        if offset + length > end:
+            break # Truncated final record (e.g. the game was killed mid-write)
+        yield elapsed_ms, event, buffer[offset:offset + length]
+        offset += length
+
+
+def _decode_start(payload):
+    # Returns (player, item ratings). Logs written before ratings were recorded hold only the player.
+    data = json.loads(bytes(payload))
+    if "player" not in data:
+        return Player.from_dict(data), {}
+    item_ratings = {(topic, difficulty): rating for topic, difficulty, rating in data["item_ratings"]}
+    return Player.from_dict(data["player"]), item_ratings
+
+
+def _decode_challenge(payload):
+    # Returns (challenge, level the review is filed under or None if it is not one).
+    data = json.loads(bytes(payload))
+    challenge = Challenge(data["level"], data["topic"], data["question"], data["answer"], data["skill_token"],
+                          data["difficulty"], data["params"])
+    review = data.get("review")
+    if review is True: # Logs from before reviews were filed under the level being played
+        review = challenge.level
+    return challenge, review
+
+
+class _LoggedReviews:
+    # Stands in for a session's ReviewScheduler during replay: reviews come
+    # from the log like every other challenge, since their due times depend
+    # on the wall clock.
+    def __init__(self, pending):
+        self.pending = pending
+
+    def next_due(self):
+        challenge, review_level = self.pending
+        return (challenge, review_level, [0, 0, 0]) if review_level is not None else None
+
+    def miss(self, challenge, level_name):
+        pass
+
+    def answered(self, level_name, entry, correct):
+        pass
+
+    def requeue(self, level_name, entry):
+        pass
+
+
+def replay(path, repeat=1):
+    # Runs every recorded session through fresh GameSessions. Returns counts of
+    # events, sessions, mismatched outcomes and the time spent.
+    from .session import GameSession # Imported here to keep the log writer free of engine state
+
+    stats = {"events": 0, "sessions": 0, "mismatches": 0, "elapsed_s": 0.0}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            session = None
+            pending = [None, None] # The recorded challenge the next start_challenge() must serve, and its review level
+            for _, event, payload in read_events(buffer):
+                stats["events"] += 1
+                if event == BEGIN:
+                    random.seed(_BEGIN.unpack_from(payload)[0])
+                    session = None
+                elif event == START:
+                    player, item_ratings = _decode_start(payload)
+                    session = GameSession(player.name, challenge_source=lambda *_: pending[0], player=player,
+                                          item_ratings=item_ratings)
+                    session.reviews = _LoggedReviews(pending)
+                    stats["sessions"] += 1
+                elif session is None:
+                    continue # Menu and name-entry input before a session exists
+                elif event == CHALLENGE:
+                    pending[:] = _decode_challenge(payload)
+                    session.start_challenge()
+                elif event == SUBMIT:
+                    correct, _ = session.submit(str(payload[1:], "utf-8"))
+                    stats["mismatches"] += correct != bool(payload[0])
+                elif event == HINT:
+                    hint = session.use_hint() or ""
+                    stats["mismatches"] += hint != str(payload, "utf-8")
+                elif event == ADVANCE:
+                    result, _ = session.advance_level()
+                    stats["mismatches"] += result != ADVANCE_RESULTS[payload[0]]
+                elif event == LEAVE:
+                    session.leave_challenge()
+                # STATE, KEY and CLICK are front end input; the engine replay only counts them.
+        stats["elapsed_s"] = time.perf_counter() - started
+    return stats
+
+
+def dump(path):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        for elapsed_ms, event, payload in read_events(buffer):
+            if event == BEGIN:
+                seed, wall_time = _BEGIN.unpack_from(payload)
+                detail = f"seed={seed} at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(wall_time))}"
+            elif event == STATE or event == ADVANCE:
+                detail = str(payload[0]) if event == STATE else ADVANCE_RESULTS[payload[0]]
+            elif event == KEY:
+                detail = f"key={_KEY.unpack_from(payload)[0]} {str(payload[_KEY.size:], 'utf-8')!r}"
+            elif event == CLICK:
+                detail = "x={} y={} button={}".format(*_CLICK.unpack_from(payload))
+            elif event == SUBMIT:
+                detail = f"{str(payload[1:], 'utf-8')!r} correct={bool(payload[0])}"
+            else:
+                detail = str(payload, "utf-8")
+            print(f"{elapsed_ms:>9} {EVENT_NAMES[event]:<9} {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded event log.")
+    parser.add_argument("command", choices=["replay", "dump"])
+    parser.add_argument("path")
+    parser.add_argument("--repeat", type=int, default=1, help="replay the log this many times")
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        dump(args.path)
+        return
+    registry.load_packs() # Recorded sessions may have played pack levels
+    stats = replay(args.path, args.repeat)
+    rate = stats["events"] / stats["elapsed_s"] if stats["elapsed_s"] else 0.0
+    print(f"{stats['sessions']} sessions, {stats['events']} events in {stats['elapsed_s']:.3f}s "
+          f"({rate:,.0f} events/s), {stats['mismatches']} mismatches")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Stream generated challenges to JSONL or CSV worksheets.
+
+Challenges are produced, formatted and written as a pipeline of generators:
+each level's N problems are split into fixed-size chunks, every chunk is
+generated and formatted into one block of text, and blocks are written as
+they arrive. Nothing holds more than a few chunks at once, so memory stays
+constant however many problems are asked for.
+
+Every chunk seeds the RNG from (seed, level, difficulty, chunk number), so
+the output does not depend on the number of workers: ``--workers`` spreads
+chunks over processes and the results are written back in order, keeping at
+most two chunks per worker in flight.
+
+    python -m amc_gauntlet.export worksheet.jsonl -n 100000 --workers 8
+    python -m amc_gauntlet.export worksheet.csv -n 500 --level "Algebra Arena" --difficulty easy
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import DIFFICULTIES, LEVELS, generate_challenge_for_level, generate_hint
+from .plugins import registry
+
+FIELDS = ("level", "topic", "difficulty", "question", "answer", "hint")
+CHUNK_SIZE = 2000
+FORMATS = ("jsonl", "csv")
+
+
+# --- Pipeline Stages ---
+
+def iter_jobs(levels, n, difficulty="medium", seed=0, chunk_size=CHUNK_SIZE):
+    # (level, difficulty, seed, chunk number, count) for every chunk, in output order.
+    for level in levels:
+        for chunk, start in enumerate(range(0, n, chunk_size)):
+            yield level, difficulty, seed, chunk, min(chunk_size, n - start)
+
+def iter_challenges(level, difficulty, seed, chunk, count):
+    random.seed(f"{seed}/{level}/{difficulty}/{chunk}")
+    for _ in range(count):
+        yield generate_challenge_for_level(level, difficulty)
+
+def iter_rows(challenges):
+    for challenge in challenges:
+        yield (challenge.level, challenge.topic, challenge.difficulty, challenge.question, challenge.answer,
+               generate_hint(challenge))
+
+def format_rows(rows, fmt):
+    if fmt == "jsonl":
+        return "".join(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + "\n" for row in rows)
+    out = io.StringIO()
+    csv.writer(out, lineterminator="\n").writerows(rows)
+    return out.getvalue()
+
+def render_chunk(job, fmt):
+    return format_rows(iter_rows(iter_challenges(*job)), fmt)
+
+def _render_job(args):
+    return render_chunk(*args)
+
+
+def iter_blocks(jobs, fmt, workers=1):
+    # Formatted chunks in job order. With workers > 1 at most 2 * workers
+    # chunks are pending at any time.
+    if workers <= 1:
+        for job in jobs:
+            yield render_chunk(job, fmt)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=registry.load_packs) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_render_job, (job, fmt)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def export(out, levels, n, fmt="jsonl", difficulty="medium", seed=0, workers=1, chunk_size=CHUNK_SIZE):
+    # Writes the worksheet to the text stream out; returns the number of rows written.
+    if fmt == "csv":
+        out.write(format_rows([FIELDS], fmt))
+    for block in iter_blocks(iter_jobs(levels, n, difficulty, seed, chunk_size), fmt, workers):
+        out.write(block)
+    return len(levels) * n
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write generated challenges with answers and hints to a file.")
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("-n", type=int, default=100, help="challenges per level")
+    parser.add_argument("--level", action="append", help="level to export (repeatable; default: all)")
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="medium")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="output format (default: from the file extension, else jsonl)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="challenges per chunk")
+    args = parser.parse_args(argv)
+
+    registry.load_packs()
+    levels = args.level or list(LEVELS)
+    for level in levels:
+        if level not in registry:
+            parser.error(f"unknown level {level!r}")
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+
+    started = time.perf_counter()
+    if args.output == "-":
+        rows = export(sys.stdout, levels, args.n, fmt, args.difficulty, args.seed, args.workers, args.chunk_size)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="", buffering=1 << 20) as out:
+            rows = export(out, levels, args.n, fmt, args.difficulty, args.seed, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"{rows} challenges in {elapsed:.2f}s ({rows / elapsed:,.0f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Hint generation from structured challenge parameters.
+
+Generators attach the numbers they drew to ``Challenge.params``; hints are
+built by looking up the topic in ``HINT_BUILDERS`` and filling a template with
+those parameters, so no question text is ever parsed. Topic packs bring their
+own builders, which the plugin registry looks up the same way.
+"""
+from .plugins import registry
+
+DEFAULT_HINT = "This problem requires careful reading. Identify the key numbers and what the question is asking you to find."
+
+# --- Templates ---
+# Bound str.format methods, so each template string is looked up once at import.
+_MODULAR = "Hint: Divide {num} by {divisor}. The answer is the leftover value.".format
+_PRIME_FACTORS = "Hint: Start dividing {num} by the smallest prime numbers (2, 3, 5, etc.) until you can't anymore. The largest one you used is the answer.".format
+_GCD = "Hint: List the factors of {a} and the factors of {b}. Find the largest number common to both lists.".format
+_LCM = "Hint: List the multiples of {a} and the multiples of {b}. The smallest number common to both lists is the answer.".format
+_DIVISOR_COUNT = "Hint: {num} = {factors}. Add 1 to each exponent and multiply the results.".format
+_DIVISOR_SUM = "Hint: {num} = {factors}. For each prime power p^e, add 1 + p + ... + p^e, then multiply those sums.".format
+
+_AREA_PERIMETER = {
+    ("rectangle", "area"): "Hint: For a rectangle, Area = Length × Width. Multiply {length} by {width}.".format,
+    ("rectangle", "perimeter"): "Hint: For a rectangle, Perimeter = 2 × (Length + Width). Add {length} and {width}, then multiply by 2.".format,
+    ("square", "area"): "Hint: For a square, Area = Side × Side. Multiply {side} by itself.".format,
+    ("square", "perimeter"): "Hint: For a square, Perimeter = 4 × Side. Multiply {side} by 4.".format,
+}
+_ANGLES = {
+    "complementary": "Hint: Complementary angles add up to 90 degrees. Subtract {angle} from 90.".format,
+    "supplementary": "Hint: Supplementary angles add up to 180 degrees. Subtract {angle} from 180.".format,
+}
+_PYTHAGOREAN = {
+    "hypotenuse": "Hint: Use a² + b² = c². So, {a}² + {b}² = c². Then take the square root.".format,
+    "leg": "Hint: Use a² + b² = c². So, {leg}² + x² = {c}². Solve for x², then take the square root.".format,
+    "count": "Hint: If the other leg is x and the hypotenuse is c, then {leg}² = c² - x² = (c - x)(c + x). Count the ways to write {leg_squared} as a product of two different factors that are both even or both odd.".format,
+}
+_SCALED_TRIPLE = " Notice the sides are {scale} times the {primitive} right triangle.".format
+
+_LINEAR_SUBTRACT = "Hint: First, subtract {b} from both sides. Then, divide both sides by {a}.".format
+_LINEAR_ADD = "Hint: First, add {b} to both sides. Then, divide both sides by {a}.".format
+_WORD_PROBLEM = "Hint: This is a multiplication problem. Multiply the number of items ({num_items}) by the cost per item (${cost_per_item}).".format
+_EXPRESSION = "Hint: Replace '{var}' with {val} in the expression. Then calculate the result.".format
+
+_PERMUTATIONS = "Hint: To find the number of ways to arrange {num_items} distinct items, calculate {num_items} factorial ({num_items}!).".format
+_DIE = {
+    "number": "Hint: There is 1 favorable outcome ({target}) out of {die_sides} total possible outcomes.".format,
+    "even": "Hint: Count the even numbers on a {die_sides}-sided die. The probability is that count divided by {die_sides}. Simplify the fraction.".format,
+    "odd": "Hint: Count the odd numbers on a {die_sides}-sided die. The probability is that count divided by {die_sides}. Simplify the fraction.".format,
+}
+_COIN = {
+    "all heads": "Hint: There is only 1 way to get all heads/tails. The total possible outcomes are 2 raised to the power of the number of flips ({total_outcomes}).".format,
+    "all tails": "Hint: There is only 1 way to get all heads/tails. The total possible outcomes are 2 raised to the power of the number of flips ({total_outcomes}).".format,
+    "exactly one head": "Hint: Think about how many positions the single head can be in. The total possible outcomes are 2 raised to the power of the number of flips ({total_outcomes}).".format,
+}
+
+
+# --- Hint Builders ---
+def _linear_equation_hint(params):
+    # ax + b = c: undo b first. Negative b means adding its magnitude.
+    b = params["b"]
+    if b < 0:
+        return _LINEAR_ADD(a=params["a"], b=-b)
+    return _LINEAR_SUBTRACT(a=params["a"], b=b)
+
+def _pythagorean_hint(params):
+    if params["missing"] == "count":
+        return _PYTHAGOREAN["count"](leg=params["leg"], leg_squared=params["leg"] ** 2)
+    hint = _PYTHAGOREAN[params["missing"]](**params)
+    if params.get("scale", 1) > 1: # Hard problems carry their triple's scale and primitive triple
+        hint += _SCALED_TRIPLE(**params)
+    return hint
+
+def _coin_hint(params):
+    return _COIN[params["event"]](total_outcomes=2 ** params["num_flips"])
+
+HINT_BUILDERS = {
+    # Number Theory
+    "Modular Arithmetic": lambda params: _MODULAR(**params),
+    "Prime Factors": lambda params: _PRIME_FACTORS(**params),
+    "GCD Calculation": lambda params: _GCD(**params),
+    "LCM Calculation": lambda params: _LCM(**params),
+    "Number of Divisors": lambda params: _DIVISOR_COUNT(**params),
+    "Sum of Divisors": lambda params: _DIVISOR_SUM(**params),
+    # Geometry
+    "Area/Perimeter": lambda params: _AREA_PERIMETER[params["shape"], params["metric"]](**params),
+    "Angle Relationships": lambda params: _ANGLES[params["relation"]](**params),
+    "Pythagorean Theorem": _pythagorean_hint,
+    # Algebra
+    "Linear Equations": _linear_equation_hint,
+    "Word Problems": lambda params: _WORD_PROBLEM(**params),
+    "Expression Evaluation": lambda params: _EXPRESSION(**params),
+    # Counting & Probability
+    "Permutations": lambda params: _PERMUTATIONS(**params),
+    "Die Probability": lambda params: _DIE[params["target_type"]](**params),
+    "Coin Probability": _coin_hint,
+}
+
+
+def generate_hint(challenge):
+    builder = registry.hint_builder(challenge.topic, challenge.level)
+    if builder is None or not challenge.params:
+        # Default fallback hint
+        return DEFAULT_HINT
+    return builder(challenge.params)
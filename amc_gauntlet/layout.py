@@ -0,0 +1,32 @@
+"""Text layout helpers shared by the question and hint displays.
+
+Line breaks are computed once per (text, font, width) and memoized, so a
+question or hint costs nothing to lay out on every frame after the first.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def wrap_text(text, font, max_width):
+    # Each word is measured once and line widths are summed incrementally,
+    # instead of re-measuring the growing line for every word.
+    space_width = font.size(' ')[0]
+    lines = []
+    current_line = []
+    line_width = 0
+    for word in text.split(' '):
+        word_width = font.size(word)[0]
+        test_width = line_width + space_width + word_width if current_line else word_width
+        if current_line and abs(test_width - max_width) <= space_width:
+            # Summed widths can be off by a pixel or two from kerning, so measure
+            # the real line when it lands close to the limit.
+            test_width = font.size(' '.join(current_line + [word]))[0]
+        if current_line and test_width > max_width:
+            lines.append(' '.join(current_line))
+            current_line = [word]
+            line_width = word_width
+        else:
+            current_line.append(word)
+            line_width = test_width
+    lines.append(' '.join(current_line))
+    return tuple(lines)
@@ -0,0 +1,167 @@
+"""Smallest-prime-factor sieve and cached factorization.
+
+The sieve stores, for every odd number up to ``limit``, its smallest prime
+factor, or 0 if the number is prime. Any composite up to 2**32 has a
+smallest prime factor below 2**16, so entries are ``array('H')`` and the
+default 10**7 sieve takes 10 MB. It is built with slice assignments, largest
+prime first so smaller primes overwrite, in well under a second of pure
+Python.
+
+Factorizing n then takes one table lookup per prime factor, O(log n), and
+``factorize`` keeps an LRU cache of the results on top of that.
+
+``get_sieve()`` builds the sieve on first use. Worker processes forked after
+that share its pages; otherwise save it once and map the file in every
+process:
+
+    python -m amc_gauntlet.numtheory build sieve.bin
+
+    use_sieve(Sieve.open("sieve.bin"))
+"""
+import argparse
+import mmap
+import struct
+import threading
+import time
+from array import array
+from functools import lru_cache
+from math import isqrt
+
+SIEVE_LIMIT = 10 ** 7
+MAGIC = b"AMCSPF01"
+_HEADER = struct.Struct("<Q") # limit
+
+
+class Sieve:
+    def __init__(self, limit, table, buffer=None):
+        self.limit = limit
+        self._table = table # Index i holds the smallest prime factor of 2i + 1 (0 when prime)
+        self._buffer = buffer # The mmap backing table, if opened from a file
+
+    @classmethod
+    def build(cls, limit=SIEVE_LIMIT):
+        size = limit // 2 + 1
+        table = array("H", bytes(2 * size))
+        root = isqrt(limit)
+        is_prime = bytearray([1]) * (root + 1)
+        for i in range(2, isqrt(root) + 1):
+            if is_prime[i]:
+                is_prime[i * i::i] = bytes(len(range(i * i, root + 1, i)))
+        for p in reversed([p for p in range(3, root + 1, 2) if is_prime[p]]):
+            start = p * p // 2
+            table[start::p] = array("H", [p]) * len(range(start, size, p))
+        return cls(limit, table)
+
+    @classmethod
+    def open(cls, path):
+        # Maps a file written by save(); processes opening the same file share its pages.
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a sieve file")
+        (limit,) = _HEADER.unpack_from(buffer, len(MAGIC))
+        table = memoryview(buffer)[len(MAGIC) + _HEADER.size:].cast("H")
+        return cls(limit, table, buffer)
+
+    def save(self, path):
+        # Native byte order: the file is meant for the machine that built it.
+        with open(path, "wb") as f:
+            f.write(MAGIC + _HEADER.pack(self.limit))
+            f.write(self._table if isinstance(self._table, array) else self._table.tobytes())
+
+    def smallest_prime_factor(self, n):
+        if n < 2 or n > self.limit:
+            raise ValueError(f"{n} is outside the sieve (2..{self.limit})")
+        if n % 2 == 0:
+            return 2
+        return self._table[n >> 1] or n
+
+    def is_prime(self, n):
+        return n >= 2 and self.smallest_prime_factor(n) == n
+
+    def factorize(self, n):
+        # ((prime, exponent), ...) in increasing order of prime; () for 1.
+        if n < 1 or n > self.limit:
+            raise ValueError(f"{n} is outside the sieve (1..{self.limit})")
+        factors = []
+        exponent = (n & -n).bit_length() - 1 # Factors of 2 straight from the bits
+        if exponent:
+            factors.append((2, exponent))
+            n >>= exponent
+        table = self._table
+        while n > 1:
+            p = table[n >> 1] or n
+            exponent = 0
+            while n % p == 0:
+                n //= p
+                exponent += 1
+            factors.append((p, exponent))
+        return tuple(factors)
+
+    def close(self):
+        if self._buffer is not None:
+            self._table.release()
+            self._buffer.close()
+
+
+# --- Shared Sieve ---
+
+_sieve = None
+_sieve_lock = threading.Lock() # The prefetch thread and the main thread may both ask first
+
+def get_sieve():
+    global _sieve
+    if _sieve is None:
+        with _sieve_lock:
+            if _sieve is None:
+                _sieve = Sieve.build()
+    return _sieve
+
+def use_sieve(sieve):
+    global _sieve
+    _sieve = sieve
+    factorize.cache_clear()
+    primes_up_to.cache_clear()
+
+
+@lru_cache(maxsize=1 << 16)
+def factorize(n):
+    return get_sieve().factorize(n)
+
+@lru_cache(maxsize=16)
+def primes_up_to(n):
+    sieve = get_sieve()
+    return tuple(p for p in range(2, n + 1) if sieve.is_prime(p))
+
+def largest_prime_factor(n):
+    return factorize(n)[-1][0]
+
+def divisor_count(n):
+    count = 1
+    for _, exponent in factorize(n):
+        count *= exponent + 1
+    return count
+
+def divisor_sum(n):
+    total = 1
+    for p, exponent in factorize(n):
+        total *= (p ** (exponent + 1) - 1) // (p - 1)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a smallest-prime-factor sieve file.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("path")
+    parser.add_argument("--limit", type=int, default=SIEVE_LIMIT)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    sieve = Sieve.build(args.limit)
+    built = time.perf_counter() - started
+    sieve.save(args.path)
+    print(f"Sieve up to {args.limit:,} built in {built:.2f}s, {2 * (args.limit // 2 + 1) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Topic packs shipped with the game.
+
+Each pack is a module in this package plus a JSON manifest next to it naming
+its levels and generator references (see ``amc_gauntlet.plugins``). Only the
+manifests are read at startup; a pack module is imported the first time one
+of its levels is played.
+"""
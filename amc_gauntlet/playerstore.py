@@ -0,0 +1,301 @@
+"""SQLite-backed player persistence.
+
+``PlayerStore`` keeps one row per player (looked up by the indexed, unique
+name) and one row per answered challenge. The database runs in WAL mode so
+reads never wait on the writer.
+
+Writes never happen on the caller's thread: ``save()`` only replaces the
+player's pending snapshot (so a burst of updates becomes one row write) and
+``record_answer()`` only appends to a list. A background thread writes
+everything pending in a single transaction every ``flush_interval`` seconds,
+or sooner once ``batch_size`` answers are waiting. SQL text is kept in
+module constants so sqlite3's statement cache reuses the prepared statements.
+
+A batch that fails to write is put back in the queue and retried on the next
+flush; until a write succeeds, ``flush()`` and ``close()`` raise the error.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+from .engine import Player
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    current_level_idx INTEGER NOT NULL,
+    correct_streak INTEGER NOT NULL,
+    skill_tokens TEXT NOT NULL,
+    power_ups TEXT NOT NULL,
+    level_progress TEXT NOT NULL,
+    skill_ratings TEXT NOT NULL DEFAULT '{}',
+    reviews TEXT NOT NULL DEFAULT '{}',
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY,
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    answered_at REAL NOT NULL,
+    level TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL DEFAULT 'medium',
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    given TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    hint_used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS answers_by_player ON answers (player_id, answered_at);
+CREATE TABLE IF NOT EXISTS answer_counts (
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    answers INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (player_id, topic, difficulty)
+);
+CREATE TABLE IF NOT EXISTS item_ratings (
+    topic TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    rating REAL NOT NULL,
+    answers INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (topic, difficulty)
+);
+"""
+# Columns added after the first release, for databases created before them.
+_MIGRATIONS = [
+    ("players", "skill_ratings", "TEXT NOT NULL DEFAULT '{}'"),
+    ("answers", "difficulty", "TEXT NOT NULL DEFAULT 'medium'"),
+    ("players", "reviews", "TEXT NOT NULL DEFAULT '{}'"),
+]
+
+_SELECT_PLAYER = """
+SELECT name, current_level_idx, correct_streak, skill_tokens, power_ups, level_progress, skill_ratings, reviews
+FROM players WHERE name = ?
+"""
+_UPSERT_PLAYER = """
+INSERT INTO players (name, current_level_idx, correct_streak, skill_tokens, power_ups, level_progress, skill_ratings, reviews,
+                     updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET
+    current_level_idx = excluded.current_level_idx,
+    correct_streak = excluded.correct_streak,
+    skill_tokens = excluded.skill_tokens,
+    power_ups = excluded.power_ups,
+    level_progress = excluded.level_progress,
+    skill_ratings = excluded.skill_ratings,
+    reviews = excluded.reviews,
+    updated_at = excluded.updated_at
+"""
+_INSERT_ANSWER = """
+INSERT INTO answers (player_id, answered_at, level, topic, difficulty, question, answer, given, correct, hint_used)
+SELECT id, ?, ?, ?, ?, ?, ?, ?, ?, ? FROM players WHERE name = ?
+"""
+_ADD_ANSWER_COUNTS = """
+INSERT INTO answer_counts (player_id, topic, difficulty, answers, correct)
+SELECT id, ?, ?, ?, ? FROM players WHERE name = ?
+ON CONFLICT (player_id, topic, difficulty) DO UPDATE SET
+    answers = answers + excluded.answers,
+    correct = correct + excluded.correct
+"""
+_BACKFILL_ANSWER_COUNTS = """
+INSERT INTO answer_counts (player_id, topic, difficulty, answers, correct)
+SELECT player_id, topic, difficulty, COUNT(*), SUM(correct) FROM answers GROUP BY player_id, topic, difficulty
+"""
+_SELECT_ANSWERS = """
+SELECT answered_at, level, topic, difficulty, question, answer, given, correct, hint_used
+FROM answers WHERE player_id = (SELECT id FROM players WHERE name = ?)
+ORDER BY answered_at DESC LIMIT ?
+"""
+_SELECT_ITEM_RATINGS = "SELECT topic, difficulty, rating FROM item_ratings"
+
+STATEMENT_CACHE_SIZE = 64
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL") # Safe with WAL; only the last commits can be lost on power failure
+    return conn
+
+
+def ensure_schema(conn):
+    had_counts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'answer_counts'").fetchone() is not None
+    conn.executescript(SCHEMA)
+    for table, column, definition in _MIGRATIONS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    if not had_counts:
+        conn.execute(_BACKFILL_ANSWER_COUNTS) # Databases from before the running counts existed
+    conn.commit()
+
+
+class PlayerStore:
+    def __init__(self, path, flush_interval=0.5, batch_size=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._writer = _connect(path)
+        ensure_schema(self._writer)
+        self._reader = _connect(path) if path != ":memory:" else self._writer
+        self._read_lock = threading.Lock()
+
+        self._pending_players = {} # name -> latest player snapshot
+        self._pending_answers = []
+        self._writing_players = {} # Snapshots taken by the writer but not yet committed
+        self._written = 0 # Number of flushes completed, for flush()
+        self._requested = 0
+        self._error = None # sqlite3.Error of the last write, None once one succeeds
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="player-store", daemon=True)
+        self._thread.start()
+
+    # --- Reads ---
+
+    def load(self, name):
+        with self._cond:
+            pending = self._pending_players.get(name) or self._writing_players.get(name)
+        if pending is not None:
+            return Player.from_dict(pending)
+
+        with self._read_lock:
+            row = self._reader.execute(_SELECT_PLAYER, (name,)).fetchone()
+        if row is None:
+            return None
+        return Player.from_dict({
+            "name": row[0],
+            "current_level_idx": row[1],
+            "correct_streak": row[2],
+            "skill_tokens": json.loads(row[3]),
+            "power_ups": json.loads(row[4]),
+            "level_progress": json.loads(row[5]),
+            "skill_ratings": json.loads(row[6]),
+            "reviews": json.loads(row[7]),
+        })
+
+    def history(self, name, limit=50):
+        # Most recent answers first; only includes answers already flushed.
+        with self._read_lock:
+            rows = self._reader.execute(_SELECT_ANSWERS, (name, limit)).fetchall()
+        keys = ("answered_at", "level", "topic", "difficulty", "question", "answer", "given", "correct", "hint_used")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def item_ratings(self):
+        # (topic, difficulty) -> rating, as last fitted by amc_gauntlet.calibrate.
+        with self._read_lock:
+            rows = self._reader.execute(_SELECT_ITEM_RATINGS).fetchall()
+        return {(topic, difficulty): rating for topic, difficulty, rating in rows}
+
+    # --- Writes (queued) ---
+
+    def save(self, player):
+        snapshot = player.to_dict()
+        with self._cond:
+            self._pending_players[player.name] = snapshot
+
+    def record_answer(self, player, challenge, given, correct):
+        row = (time.time(), challenge.level, challenge.topic, challenge.difficulty, challenge.question, challenge.answer,
+               given, int(correct), int(challenge.hint_given), player.name)
+        with self._cond:
+            self._pending_players[player.name] = player.to_dict() # Answers need the player row to exist
+            self._pending_answers.append(row)
+            if len(self._pending_answers) >= self.batch_size:
+                self._cond.notify()
+
+    def flush(self):
+        # Block until everything queued so far is on disk. Raises the sqlite3.Error if it could not be written.
+        with self._cond:
+            self._requested += 1
+            target = self._requested
+            self._cond.notify()
+            self._cond.wait_for(lambda: self._written >= target or not self._thread.is_alive())
+            error = self._error
+        if error is not None:
+            raise error
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if self._reader is not self._writer:
+            self._reader.close()
+        self._writer.close()
+        if self._error is not None:
+            raise self._error # What is still queued is lost
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # --- Background writer ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # After a failed write a full batch waits for the interval, so the retries do not spin.
+                self._cond.wait_for(
+                    lambda: self._closed or self._requested > self._written
+                    or (self._error is None and len(self._pending_answers) >= self.batch_size),
+                    timeout=self.flush_interval,
+                )
+                players, self._pending_players = self._pending_players, {}
+                self._writing_players = players
+                answers, self._pending_answers = self._pending_answers, []
+                requested = self._requested
+                closed = self._closed
+
+            error = None
+            if players or answers:
+                try:
+                    self._write(players, answers)
+                except sqlite3.Error as e:
+                    error = e
+
+            with self._cond:
+                if error is not None:
+                    # Put the batch back: newer snapshots win and the answers keep their order.
+                    players.update(self._pending_players)
+                    self._pending_players = players
+                    self._pending_answers[:0] = answers
+                    self._error = error
+                elif players or answers:
+                    self._error = None
+                self._writing_players = {}
+                self._written = requested
+                self._cond.notify_all()
+            if closed:
+                return
+
+    def _write(self, players, answers):
+        now = time.time()
+        with self._writer: # One transaction per batch
+            self._writer.executemany(_UPSERT_PLAYER, [
+                (name, data["current_level_idx"], data["correct_streak"], json.dumps(data["skill_tokens"]),
+                 json.dumps(data["power_ups"]), json.dumps(data["level_progress"]), json.dumps(data["skill_ratings"]),
+                 json.dumps(data["reviews"], ensure_ascii=False, separators=(",", ":")), now)
+                for name, data in players.items()
+            ])
+            self._writer.executemany(_INSERT_ANSWER, answers)
+            self._writer.executemany(_ADD_ANSWER_COUNTS, _count_answers(answers))
+
+
+def _count_answers(answers):
+    # Per (player, topic, difficulty) totals of one batch, for the answer_counts table.
+    counts = {}
+    for row in answers:
+        key = (row[-1], row[2], row[3]) # name, topic, difficulty
+        total = counts.setdefault(key, [0, 0])
+        total[0] += 1
+        total[1] += row[7]
+    return [(topic, difficulty, total, correct, name) for (name, topic, difficulty), (total, correct) in counts.items()]
@@ -0,0 +1,162 @@
+"""Registry of levels, their challenge generators and hint builders.
+
+A level registers a generator either as a callable or as a
+``"module:attribute"`` reference. References are only imported the first
+time a challenge for that level is generated (or a hint is needed for one),
+so an installed topic pack costs a few bytes of metadata at startup and
+nothing else until it is played. When a pack module is imported, its
+``HINT_BUILDERS`` dict (topic -> builder taking the challenge params), if it
+has one, is merged into the registry's hint builders.
+
+The built-in levels are registered by ``amc_gauntlet.engine``. Front ends and
+servers call ``registry.load_packs()`` once at startup to add the rest from
+
+* JSON manifests in the ``amc_gauntlet/packs`` directory, e.g.::
+
+      {"levels": [{"name": "Number Patterns Plaza",
+                   "generator": "amc_gauntlet.packs.patterns:generate",
+                   "order": 450, "pinnacle": true}]}
+
+* installed distributions with an ``amc_gauntlet.levels`` entry point whose
+  name is the level and whose value is the generator reference.
+
+Levels are kept sorted by ``order``: the built-in topic levels use 100-400 and
+the Problem-Solving Pinnacle 1000, so packs (default 500) come between the
+last topic level and the final challenge. ``pinnacle`` levels are the ones
+the Pinnacle draws its mixed challenges from.
+
+A level may also list its question ``kinds`` and the topics each one produces
+(a manifest gives ``"kinds": {"sequence": ["Number Sequences"]}``). Sessions
+then pick the kind themselves, weighted towards the player's weak topics, and
+call the generator as ``generate(difficulty, kind)``; levels without kinds are
+only ever called with the difficulty.
+"""
+import importlib
+import json
+import os
+import threading
+
+ENTRY_POINT_GROUP = "amc_gauntlet.levels"
+PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+DEFAULT_ORDER = 500
+
+
+class LevelPlugin:
+    __slots__ = ("name", "order", "pinnacle", "map_rect", "kinds", "source", "reference", "generator")
+
+    def __init__(self, name, generator, order=DEFAULT_ORDER, pinnacle=False, map_rect=None, kinds=None,
+                 source="built-in"):
+        self.name = name
+        self.order = order
+        self.pinnacle = pinnacle # The Pinnacle may draw challenges from this level
+        self.map_rect = map_rect # (x, y, width, height) on the level map, or None to lay out automatically
+        self.kinds = kinds # Callable: difficulty -> {kind: (topic, ...)}, or None
+        self.source = source # Where the level was registered from, for error messages
+        if callable(generator):
+            self.reference = None
+            self.generator = generator
+        else:
+            self.reference = generator # "module:attribute", imported on first use
+            self.generator = None
+
+
+class PluginRegistry:
+    def __init__(self):
+        self.levels = [] # Level names in play order; updated in place so module-level references stay current
+        self.hint_builders = {} # topic -> builder
+        self._plugins = {}
+        self._pinnacle_levels = None # Cached tuple, reset whenever a level is registered
+        self._lock = threading.Lock() # The prefetch thread may load a pack while the main thread does too
+        self._packs_loaded = False
+
+    def register(self, name, generator, order=DEFAULT_ORDER, pinnacle=False, hint_builders=None, map_rect=None,
+                 kinds=None, source="built-in"):
+        existing = self._plugins.get(name)
+        if existing is not None:
+            raise ValueError(f"Level {name!r} from {source} is already registered by {existing.source}")
+        self._plugins[name] = LevelPlugin(name, generator, order, pinnacle, map_rect, kinds, source)
+        if hint_builders:
+            self.hint_builders.update(hint_builders)
+        self.levels[:] = sorted(self._plugins, key=lambda level: self._plugins[level].order)
+        self._pinnacle_levels = None
+
+    def __contains__(self, name):
+        return name in self._plugins
+
+    def plugin(self, name):
+        return self._plugins[name]
+
+    def generator(self, name):
+        # Returns None for unknown levels.
+        plugin = self._plugins.get(name)
+        if plugin is None:
+            return None
+        if plugin.generator is None:
+            self._load(plugin)
+        return plugin.generator
+
+    def hint_builder(self, topic, level=None):
+        builder = self.hint_builders.get(topic)
+        if builder is None and level is not None:
+            # The topic may belong to a pack that has not been imported yet.
+            self.generator(level)
+            builder = self.hint_builders.get(topic)
+        return builder
+
+    def kinds(self, name, difficulty="medium"):
+        # {kind: (topic, ...)} the level's generator accepts; empty if it takes no kind.
+        plugin = self._plugins.get(name)
+        if plugin is None or plugin.kinds is None:
+            return {}
+        return plugin.kinds(difficulty)
+
+    def pinnacle_levels(self):
+        if self._pinnacle_levels is None:
+            self._pinnacle_levels = tuple(name for name in self.levels if self._plugins[name].pinnacle)
+        return self._pinnacle_levels
+
+    def loaded_levels(self):
+        return [name for name in self.levels if self._plugins[name].generator is not None]
+
+    def _load(self, plugin):
+        with self._lock:
+            if plugin.generator is not None:
+                return
+            module_name, _, attribute = plugin.reference.partition(":")
+            module = importlib.import_module(module_name)
+            self.hint_builders.update(getattr(module, "HINT_BUILDERS", {}))
+            plugin.generator = getattr(module, attribute)
+
+    # --- Discovery ---
+
+    def load_packs(self, directory=PACKS_DIR, use_entry_points=True):
+        # Registers every pack found; only reads metadata. Safe to call more than once.
+        if self._packs_loaded:
+            return
+        self._packs_loaded = True
+        if directory and os.path.isdir(directory):
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith(".json"):
+                    self._load_manifest(os.path.join(directory, filename))
+        if use_entry_points:
+            from importlib.metadata import entry_points # Slow to import, so only when packs are looked for
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                source = f"entry point {entry_point.value}"
+                if entry_point.dist is not None:
+                    source = f"{entry_point.dist.name} ({source})"
+                self.register(entry_point.name, entry_point.value, source=source)
+
+    def _load_manifest(self, path):
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        for level in manifest["levels"]:
+            map_rect = level.get("map_rect")
+            kinds = level.get("kinds")
+            if kinds:
+                kinds = {kind: tuple(topics) for kind, topics in kinds.items()}
+            self.register(level["name"], level["generator"], level.get("order", DEFAULT_ORDER),
+                          level.get("pinnacle", False), map_rect=tuple(map_rect) if map_rect else None,
+                          kinds=(lambda difficulty, kinds=kinds: kinds) if kinds else None, source=path)
+
+
+registry = PluginRegistry()
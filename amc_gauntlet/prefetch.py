@@ -0,0 +1,92 @@
+"""Background prefetching of upcoming challenges.
+
+A worker thread keeps the next few challenges for the active level and
+difficulty generated, with their hints already built, so the UI only has to
+pop one off a deque when the player asks for a new challenge. Levels with
+question kinds get a queue per kind, since the session picks the kind.
+"""
+import threading
+from collections import deque
+
+from .engine import generate_challenge_for_level, generate_hint
+from .plugins import registry
+
+
+class ChallengePrefetcher:
+    def __init__(self, depth=3):
+        self.depth = depth
+        self._queues = {}
+        self._active = () # (level, difficulty, kind) keys being kept filled
+        self._running = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="challenge-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def set_level(self, level_name, difficulty="medium"):
+        # Called whenever the player's current level or target difficulty
+        # changes; the worker refills the queues for that pair first.
+        keys = tuple((level_name, difficulty, kind) for kind in registry.kinds(level_name, difficulty) or (None,))
+        with self._cond:
+            self._active = keys
+            for key in keys:
+                self._queues.setdefault(key, deque())
+            self._cond.notify_all()
+
+    def get(self, level_name, difficulty="medium", kind=None):
+        key = (level_name, difficulty, kind)
+        with self._cond:
+            queue = self._queues.get(key)
+            challenge = queue.popleft() if queue else None
+            self._cond.notify_all()
+        if challenge is None:
+            # Queue ran dry (or the level was never activated): generate inline.
+            challenge = _prepare(key)
+        return challenge
+
+    def pending(self, level_name, difficulty="medium", kind=None):
+        with self._cond:
+            return len(self._queues.get((level_name, difficulty, kind), ()))
+
+    def _next_key_to_fill(self):
+        # The active queue with the fewest challenges, so every kind stays stocked.
+        key = min(self._active, key=lambda key: len(self._queues[key]), default=None)
+        if key is not None and len(self._queues[key]) < self.depth:
+            return key
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._next_key_to_fill() is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                key = self._next_key_to_fill()
+
+            challenge = _prepare(key) # Generate outside the lock
+
+            with self._cond:
+                queue = self._queues[key]
+                if len(queue) < self.depth:
+                    queue.append(challenge)
+
+
+def _prepare(key):
+    challenge = generate_challenge_for_level(*key)
+    challenge.hint = generate_hint(challenge)
+    return challenge
@@ -0,0 +1,221 @@
+"""Per-frame timing of the main loop, for finding where frames go slow.
+
+``FrameProfiler`` times named phases of every frame (event polling, the state
+update, each draw function, text rendering, presenting the display) and
+keeps the last ``window`` frames, from which ``report()`` gives p50/p95/p99
+frame times, per-phase means and 95th percentiles, counters such as events
+per frame and the hit rate of any cache with ``hits``/``misses`` attributes.
+Phase times are inclusive: a draw function's time includes the text it
+renders, which is also counted under its own phase.
+
+While disabled, ``phase()`` and ``timed()`` functions only check a flag, so
+the instrumentation can stay in place. ``capture(frames, path)`` runs
+cProfile over the next ``frames`` frames (whether or not timing is enabled)
+and writes the stats to ``path`` for ``python -m pstats`` or snakeviz.
+
+Nothing in here imports pygame.
+"""
+import functools
+import time
+from collections import deque
+
+
+class _Phase:
+    # Reusable context manager for one phase name; phases with the same name must not nest.
+    __slots__ = ("profiler", "name", "started")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        if self.profiler.enabled:
+            self.started = self.profiler.clock()
+
+    def __exit__(self, *exc_info):
+        if self.started is not None:
+            self.profiler.add(self.name, self.profiler.clock() - self.started)
+            self.started = None
+
+
+class FrameProfiler:
+    def __init__(self, window=240, clock=time.perf_counter):
+        self.window = window
+        self.clock = clock
+        self.enabled = False
+        self.frames = 0 # Frames completed while enabled
+        self.last_capture = None # Path of the last cProfile dump
+        self._frames = deque(maxlen=window) # (work seconds, interval seconds, phase times, counts)
+        self._caches = {} # name -> cache object
+        self._cache_history = deque(maxlen=window + 1) # {name: (hits, misses)} at the end of each frame
+        self._phases = {}
+        self._current = {}
+        self._counts = {}
+        self._frame_started = None
+        self._last_frame_started = None
+        self._profile = None
+        self._capture_left = 0
+        self._capture_path = None
+        self._capture_running = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.reset()
+        return self.enabled
+
+    def reset(self):
+        self._frames.clear()
+        self._cache_history.clear()
+        self._last_frame_started = None
+        self._frame_started = None
+        self._current = {}
+        self._counts = {}
+
+    # --- Instrumentation ---
+
+    def phase(self, name):
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase(self, name)
+        return phase
+
+    def timed(self, name=None):
+        # Decorator timing every call of a function as a phase.
+        def decorate(fn):
+            phase_name = name or fn.__name__
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                started = self.clock()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add(phase_name, self.clock() - started)
+            return wrapper
+        return decorate
+
+    def add(self, name, seconds):
+        self._current[name] = self._current.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def watch_cache(self, name, cache):
+        self._caches[name] = cache
+
+    # --- Frames ---
+
+    def begin_frame(self):
+        if self._profile is not None and self._capture_left and not self._capture_running:
+            self._profile.enable()
+            self._capture_running = True
+        if not self.enabled:
+            return
+        now = self.clock()
+        self._last_frame_started, self._frame_started = self._frame_started, now
+        self._current = {}
+        self._counts = {}
+
+    def end_frame(self):
+        if self._profile is not None and self._capture_running:
+            self._capture_left -= 1
+            if not self._capture_left:
+                self._finish_capture()
+        if not self.enabled or self._frame_started is None:
+            return
+        now = self.clock()
+        interval = self._frame_started - self._last_frame_started if self._last_frame_started is not None else None
+        self._frames.append((now - self._frame_started, interval, self._current, self._counts))
+        self._cache_history.append({name: (cache.hits, cache.misses) for name, cache in self._caches.items()})
+        self.frames += 1
+
+    # --- cProfile Capture ---
+
+    @property
+    def capturing(self):
+        return self._profile is not None
+
+    def capture(self, frames, path):
+        # Profiles the next `frames` frames and dumps pstats to path. Ignored while a capture is running.
+        if self._profile is not None:
+            return False
+        import cProfile # Only needed when a capture is asked for
+        self._profile = cProfile.Profile()
+        self._capture_left = frames
+        self._capture_path = path
+        self._capture_running = False
+        return True
+
+    def _finish_capture(self):
+        self._profile.disable()
+        self._profile.dump_stats(self._capture_path)
+        self.last_capture = self._capture_path
+        self._profile = None
+        self._capture_running = False
+
+    # --- Reporting ---
+
+    def report(self):
+        # Statistics over the frames in the window, times in milliseconds.
+        frames = list(self._frames)
+        if not frames:
+            return None
+        work = sorted(frame[0] * 1000 for frame in frames)
+        intervals = sorted(frame[1] * 1000 for frame in frames if frame[1] is not None)
+        phases = {}
+        for _, _, phase_times, _ in frames:
+            for name, seconds in phase_times.items():
+                phases.setdefault(name, []).append(seconds * 1000)
+        counts = {name: [frame[3].get(name, 0) for frame in frames]
+                  for name in {name for frame in frames for name in frame[3]}}
+
+        caches = {}
+        if len(self._cache_history) > 1:
+            first, last = self._cache_history[0], self._cache_history[-1]
+            for name in last:
+                hits = last[name][0] - first[name][0]
+                lookups = hits + last[name][1] - first[name][1]
+                caches[name] = hits / lookups if lookups else None
+
+        return {
+            "frames": len(frames),
+            "frame_ms": {"p50": percentile(work, 50), "p95": percentile(work, 95), "p99": percentile(work, 99),
+                         "max": work[-1]},
+            "interval_ms": {"p50": percentile(intervals, 50), "p99": percentile(intervals, 99),
+                            "max": intervals[-1]} if intervals else None,
+            # Means are over every frame in the window; p95 only over the frames where the phase ran.
+            "phases": {name: {"mean": sum(times) / len(frames), "p95": percentile(sorted(times), 95)}
+                       for name, times in phases.items()},
+            "counts": {name: {"mean": sum(values) / len(values), "max": max(values)} for name, values in counts.items()},
+            "cache_hit_rates": caches,
+        }
+
+    def report_lines(self):
+        report = self.report()
+        if report is None:
+            return ["Collecting frames..."]
+        frame = report["frame_ms"]
+        lines = [f"frame ms  p50 {frame['p50']:.2f}  p95 {frame['p95']:.2f}  p99 {frame['p99']:.2f}  max {frame['max']:.1f}"]
+        interval = report["interval_ms"]
+        if interval:
+            lines.append(f"interval ms  p50 {interval['p50']:.1f}  p99 {interval['p99']:.1f}  max {interval['max']:.1f}")
+        for name, count in report["counts"].items():
+            lines.append(f"{name}/frame  mean {count['mean']:.2f}  max {count['max']}")
+        rates = [f"{name} {rate:.1%}" for name, rate in report["cache_hit_rates"].items() if rate is not None]
+        if rates:
+            lines.append("hit rate  " + "  ".join(rates))
+        lines.append("phase ms (mean / p95)")
+        for name, phase in sorted(report["phases"].items(), key=lambda item: -item[1]["mean"]):
+            lines.append(f"  {name:<22} {phase['mean']:6.3f} / {phase['p95']:6.3f}")
+        return lines
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list.
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100)) # ceil(n * p / 100)
+    return sorted_values[int(rank) - 1]
@@ -0,0 +1,96 @@
+"""Spaced-repetition reviews of missed challenges.
+
+A challenge the player gets wrong is queued to be asked again after
+``REVIEW_INTERVALS[0]``. Each correct review moves it to the next, longer
+interval (minutes, then hours, then days and weeks) and a wrong one sends it
+back to the first; answering it right after the last interval retires it.
+
+Every level has its own heap (``heapq``) of entries ordered by due time, so
+queueing an item and popping the most overdue one are O(log n). A miss is
+filed under the level being played, which for the Pinnacle is not the level
+the challenge came from, and its reviews count towards that level. Entries
+are plain lists, so the heaps live in ``Player.reviews`` and are saved with
+the player as JSON:
+
+    [due, box, key, topic, question, answer, skill_token, difficulty, params, challenge level]
+
+(entries saved before the challenge level was added end at ``params``).
+
+Memory stays bounded over months of play: items overdue by more than
+``EXPIRE_AFTER`` are dropped when they reach the top of their heap, and a
+level holds at most ``MAX_REVIEWS_PER_LEVEL`` items, dropping the one due
+last when a new miss arrives.
+"""
+import heapq
+import time
+
+from .engine import Challenge
+from .seen import challenge_key
+
+MINUTE, HOUR, DAY = 60, 3600, 86400
+REVIEW_INTERVALS = (5 * MINUTE, HOUR, DAY, 3 * DAY, 7 * DAY, 21 * DAY) # Wait before the review in each box
+EXPIRE_AFTER = 8 * 7 * DAY # Overdue items older than this are forgotten
+MAX_REVIEWS_PER_LEVEL = 128
+DUE, BOX, KEY = 0, 1, 2 # Entry fields; the rest are the Challenge's
+
+
+class ReviewScheduler:
+    def __init__(self, reviews, clock=time.time):
+        self.reviews = reviews # level -> heap of entries; the Player's own dict
+        self.clock = clock
+        self._keys = {entry[KEY] for heap in reviews.values() for entry in heap} # Queued items, to skip duplicates
+
+    def __len__(self):
+        return len(self._keys)
+
+    def miss(self, challenge, level_name):
+        # Queue a challenge answered wrongly outside a review, under the level being played.
+        key = challenge_key(challenge)
+        if key in self._keys:
+            return
+        entry = [int(self.clock()) + REVIEW_INTERVALS[0], 0, key, challenge.topic, challenge.question,
+                 challenge.answer, challenge.skill_token, challenge.difficulty, challenge.params, challenge.level]
+        self._push(level_name, entry)
+
+    def next_due(self):
+        # Pops the most overdue review of any level. Returns (challenge, level it is filed under, entry),
+        # or None if nothing is due.
+        now = self.clock()
+        best = None
+        for level, heap in self.reviews.items():
+            while heap and heap[0][DUE] + EXPIRE_AFTER < now:
+                self._keys.discard(heapq.heappop(heap)[KEY])
+            if heap and heap[0][DUE] <= now and (best is None or heap[0][DUE] < best[0][DUE]):
+                best = heap
+                best_level = level
+        if best is None:
+            return None
+        entry = heapq.heappop(best)
+        self._keys.discard(entry[KEY])
+        challenge_level = entry[9] if len(entry) > 9 else best_level
+        return Challenge(challenge_level, *entry[3:9]), best_level, entry
+
+    def answered(self, level_name, entry, correct):
+        # Reschedule a review returned by next_due().
+        box = entry[BOX] + 1 if correct else 0
+        if box == len(REVIEW_INTERVALS):
+            return # Learned
+        entry[DUE] = int(self.clock()) + REVIEW_INTERVALS[box]
+        entry[BOX] = box
+        self._push(level_name, entry)
+
+    def requeue(self, level_name, entry):
+        # Put back a review the player left without answering.
+        self._push(level_name, entry)
+
+    def _push(self, level, entry):
+        heap = self.reviews.setdefault(level, [])
+        if len(heap) >= MAX_REVIEWS_PER_LEVEL:
+            # O(n), but only once a level is full.
+            last = max(range(len(heap)), key=lambda i: heap[i][DUE])
+            self._keys.discard(heap[last][KEY])
+            heap[last] = heap[-1]
+            heap.pop()
+            heapq.heapify(heap)
+        heapq.heappush(heap, entry)
+        self._keys.add(entry[KEY])
@@ -0,0 +1,72 @@
+"""Weighted random choice with Vose's alias method.
+
+Building the table takes O(n): every item gets one column holding its own
+probability and an "alias" item that fills the rest of the column. A draw
+then takes a single ``random()`` call: its integer part picks a column and
+its fractional part picks between the column's item and its alias, so it is
+O(1) however many items there are.
+
+``reweight`` only records the new weight and the table is rebuilt on the
+next draw, so any number of weight changes between draws (e.g. after an
+answer moves several topic ratings) costs one rebuild.
+"""
+import random
+
+
+class AliasSampler:
+    def __init__(self, items, weights=None):
+        self.items = list(items)
+        if not self.items:
+            raise ValueError("AliasSampler needs at least one item")
+        self.weights = [1.0] * len(self.items) if weights is None else [float(w) for w in weights]
+        if len(self.weights) != len(self.items):
+            raise ValueError("items and weights differ in length")
+        self._index = {item: i for i, item in enumerate(self.items)}
+        self._prob = None # None until built, and again whenever a weight changes
+        self._alias = None
+
+    def __len__(self):
+        return len(self.items)
+
+    def index(self, item):
+        return self._index[item]
+
+    def reweight(self, i, weight):
+        if weight != self.weights[i]:
+            self.weights[i] = float(weight)
+            self._prob = None
+
+    def probability(self, i):
+        return self.weights[i] / sum(self.weights)
+
+    def _build(self):
+        weights = self.weights
+        total = sum(weights)
+        if total <= 0 or min(weights) < 0:
+            raise ValueError("weights must be non-negative with a positive sum")
+        n = len(weights)
+        prob = [w * n / total for w in weights] # Scaled so the average column holds exactly 1
+        alias = list(range(n))
+        small = [i for i, p in enumerate(prob) if p < 1.0]
+        large = [i for i, p in enumerate(prob) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            alias[s] = l # Column s is topped up with item l
+            prob[l] -= 1.0 - prob[s]
+            (small if prob[l] < 1.0 else large).append(l)
+        for i in small + large:
+            prob[i] = 1.0 # Whatever is left is full up to rounding error
+        self._alias = alias # Before _prob: another thread may sample as soon as _prob is set
+        self._prob = prob
+
+    def sample(self, rng=random):
+        prob = self._prob
+        if prob is None:
+            self._build()
+            prob = self._prob
+        n = len(prob)
+        u = rng.random() * n
+        i = int(u)
+        if i == n: # random() * n can round up to n
+            i = n - 1
+        return self.items[i] if u - i < prob[i] else self.items[self._alias[i]]
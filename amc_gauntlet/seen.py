@@ -0,0 +1,153 @@
+"""Per-player history of challenges already shown.
+
+Every challenge gets a 64-bit canonical key: a hash of its topic and its
+structured params (or of the question text when it has none), so the same
+question is recognized no matter which generator or batch produced it.
+
+``SeenSet`` stores those keys in an open-addressing table backed by
+``array('Q')`` (8 bytes per slot, at most half full). For very long
+histories an optional Bloom filter takes over once ``exact_limit`` keys have
+been stored: the exact table is folded into the filter and emptied, so memory
+stays bounded while old questions are still (almost always) recognized.
+
+``UniqueChallengeSource`` wraps any ``level_name -> Challenge`` source and
+redraws until it gets an unseen challenge. While unseen questions remain
+common this takes O(1) expected draws. A topic that keeps coming back seen
+is reported as exhausted, and after ``max_tries`` draws a repeat is returned
+rather than looping forever.
+"""
+import json
+from array import array
+from hashlib import blake2b
+
+_EMPTY = 0
+
+
+def challenge_key(challenge):
+    if challenge.params:
+        text = challenge.topic + "\0" + json.dumps(challenge.params, sort_keys=True, separators=(",", ":"))
+    else:
+        text = challenge.topic + "\0" + challenge.question
+    key = int.from_bytes(blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    return key or 1 # 0 marks an empty slot
+
+
+class BloomFilter:
+    def __init__(self, num_bits=1 << 20, num_hashes=7):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray((num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing on the two 32-bit halves of the key.
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenSet:
+    def __init__(self, exact_limit=None, bloom_bits=1 << 20, bloom_hashes=7):
+        self.exact_limit = exact_limit # None: never spill, keep every key exactly
+        self.bloom_bits = bloom_bits
+        self.bloom_hashes = bloom_hashes
+        self.bloom = None # Created on the first spill
+        self._slots = array("Q", bytes(8 * 64))
+        self._count = 0
+        self.total_added = 0
+
+    def __len__(self):
+        return self.total_added
+
+    def __contains__(self, key):
+        if self._find(key) is not None:
+            return True
+        return self.bloom is not None and key in self.bloom
+
+    def add(self, key):
+        # Returns True if the key was new.
+        if key in self:
+            return False
+        if self.exact_limit is not None and self._count >= self.exact_limit:
+            self._spill()
+        if (self._count + 1) * 2 > len(self._slots):
+            self._resize(len(self._slots) * 2)
+        self._insert(key)
+        self.total_added += 1
+        return True
+
+    def nbytes(self):
+        size = self._slots.itemsize * len(self._slots)
+        if self.bloom is not None:
+            size += len(self.bloom.bits)
+        return size
+
+    def _find(self, key):
+        slots = self._slots
+        mask = len(slots) - 1
+        i = key & mask
+        while slots[i] != _EMPTY:
+            if slots[i] == key:
+                return i
+            i = (i + 1) & mask
+        return None
+
+    def _insert(self, key):
+        slots = self._slots
+        mask = len(slots) - 1
+        i = key & mask
+        while slots[i] != _EMPTY:
+            i = (i + 1) & mask
+        slots[i] = key
+        self._count += 1
+
+    def _resize(self, size):
+        old = self._slots
+        self._slots = array("Q", bytes(8 * size))
+        self._count = 0
+        for key in old:
+            if key != _EMPTY:
+                self._insert(key)
+
+    def _spill(self):
+        if self.bloom is None:
+            self.bloom = BloomFilter(self.bloom_bits, self.bloom_hashes)
+        for key in self._slots:
+            if key != _EMPTY:
+                self.bloom.add(key)
+        self._slots = array("Q", bytes(8 * 64))
+        self._count = 0
+
+
+class UniqueChallengeSource:
+    def __init__(self, source, seen=None, max_tries=32, exhaust_after=16):
+        self.source = source
+        self.seen = seen if seen is not None else SeenSet()
+        self.max_tries = max_tries
+        self.exhaust_after = exhaust_after # Repeats in a row before a topic counts as exhausted
+        self.exhausted = set() # (level, topic) pairs
+        self._repeats = {}
+
+    def __call__(self, level_name, difficulty="medium", kind=None):
+        # The source is only passed a kind when one is asked for. If the first
+        # half of the tries are all repeats of it, the rest let the source pick.
+        challenge = None
+        for attempt in range(self.max_tries):
+            if kind is not None and attempt < self.max_tries // 2:
+                challenge = self.source(level_name, difficulty, kind)
+            else:
+                challenge = self.source(level_name, difficulty)
+            if self.seen.add(challenge_key(challenge)):
+                self._repeats[challenge.topic] = 0
+                return challenge
+            repeats = self._repeats.get(challenge.topic, 0) + 1
+            self._repeats[challenge.topic] = repeats
+            if repeats >= self.exhaust_after:
+                self.exhausted.add((level_name, challenge.topic))
+        return challenge # Everything we drew was a repeat; show one rather than stall
@@ -0,0 +1,230 @@
+"""Asyncio challenge server.
+
+Hosts many concurrent ``GameSession`` objects in one process and speaks a
+small line-delimited JSON protocol over TCP, by default on localhost only.
+Every request is one JSON object per line with an ``op`` field; every reply
+is one JSON object per line with ``ok`` and, on success, the session
+``state``.
+
+    {"op": "hello", "name": "Ada"}       start a session (must come first)
+    {"op": "challenge"}                  draw a challenge for the current level
+    {"op": "answer", "text": "12"}       submit an answer -> correct, feedback
+    {"op": "hint"}                       spend a Hint Helper -> hint
+    {"op": "next_level"}                 advance once the level is mastered -> result, message
+    {"op": "leave"}                      back to the map
+    {"op": "state"}                      current state only
+    {"op": "bye"}                        close the connection
+
+Each connection handles one request at a time and waits for its reply to
+drain before it reads the next line, so a slow reader only holds up itself.
+Line length, concurrent sessions and idle time are all capped. Every
+session operation (loading the player on ``hello``, generating and checking
+challenges, building the reply state) runs on the default executor, so one
+slow request never stalls the event loop, and the generators' lookup tables
+(the prime sieve, the Pythagorean triple indexes) are built before the first
+connection is accepted. With ``--db`` players are loaded by name on ``hello``
+and their progress and answers are saved to SQLite in the background. The calibrated item ratings are read once at
+start and again every ``--ratings-refresh`` seconds, so a run of
+``amc_gauntlet.calibrate`` reaches new sessions without a restart. With ``--space`` challenges are drawn from
+a prebuilt problem space file (see ``amc_gauntlet.space``), which every
+server process maps read-only.
+
+    python -m amc_gauntlet.server --port 8765 --db players.db --space problems.bin
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+
+from .engine import DIFFICULTY_SETTINGS, generate_challenge_for_level
+from .numtheory import get_sieve
+from .playerstore import PlayerStore
+from .plugins import registry
+from .session import GameSession, SessionError
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_LINE_BYTES = 4096
+MAX_NAME_LENGTH = 40
+ITEM_RATINGS_REFRESH = 300 # Seconds between reloads of the calibrated item ratings
+
+
+class ChallengeServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_sessions=10000, idle_timeout=600, store=None,
+                 challenge_source=generate_challenge_for_level, ratings_refresh=ITEM_RATINGS_REFRESH):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.store = store
+        self.challenge_source = challenge_source
+        self.ratings_refresh = ratings_refresh
+        self.item_ratings = {} # Shared by new sessions; replaced, never changed in place, on every reload
+        self.sessions = {} # writer -> GameSession
+        self.connections = 0
+        self._server = None
+        self._refresh_task = None
+
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(None, _warm_generators)
+        if self.store is not None and self._refresh_task is None:
+            await self._load_item_ratings()
+            self._refresh_task = asyncio.create_task(self._refresh_item_ratings())
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, limit=MAX_LINE_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1] # Resolve port 0 to the real port
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _load_item_ratings(self):
+        self.item_ratings = await asyncio.get_running_loop().run_in_executor(None, self.store.item_ratings)
+
+    async def _refresh_item_ratings(self):
+        while True:
+            await asyncio.sleep(self.ratings_refresh)
+            try:
+                await self._load_item_ratings()
+            except sqlite3.Error:
+                pass # Keep the ratings we have and try again next time
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            if self.connections > self.max_sessions:
+                await _send(writer, {"ok": False, "error": "Server is full"})
+                return
+
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await _send(writer, {"ok": False, "error": "Idle timeout"})
+                    return
+                except (asyncio.LimitOverrunError, ValueError):
+                    await _send(writer, {"ok": False, "error": "Request too long"})
+                    return
+                if not line:
+                    return # Client closed the connection
+
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    await _send(writer, {"ok": False, "error": "Malformed request"})
+                    continue
+
+                if request.get("op") == "bye":
+                    await _send(writer, {"ok": True})
+                    return
+                await _send(writer, await self.handle_request(writer, request))
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            self.sessions.pop(writer, None)
+            writer.close()
+
+    async def handle_request(self, key, request):
+        op = request.get("op")
+        if op == "hello":
+            name = str(request.get("name", "")).strip()[:MAX_NAME_LENGTH]
+            if not name:
+                return {"ok": False, "error": "A name is required"}
+            session, state = await asyncio.get_running_loop().run_in_executor(
+                None, _new_session, name, self.challenge_source, self.store, self.item_ratings)
+            self.sessions[key] = session
+            return {"ok": True, "state": state}
+
+        session = self.sessions.get(key)
+        if session is None:
+            return {"ok": False, "error": "Say hello first"}
+        # A session belongs to one connection, which sends its next request only
+        # after this reply, so no two threads ever use the same session.
+        return await asyncio.get_running_loop().run_in_executor(None, _session_request, session, op, request)
+
+
+def _new_session(name, challenge_source, store, item_ratings):
+    session = GameSession(name, challenge_source, store=store, item_ratings=item_ratings)
+    return session, session.snapshot()
+
+
+def _session_request(session, op, request):
+    try:
+        reply = {"ok": True}
+        if op == "challenge":
+            session.start_challenge()
+        elif op == "answer":
+            reply["correct"], reply["feedback"] = session.submit(str(request.get("text", "")))
+        elif op == "hint":
+            reply["hint"] = session.use_hint()
+        elif op == "next_level":
+            reply["result"], reply["message"] = session.advance_level()
+        elif op == "leave":
+            session.leave_challenge()
+        elif op != "state":
+            return {"ok": False, "error": f"Unknown op {op!r}"}
+    except SessionError as e:
+        return {"ok": False, "error": str(e)}
+
+    reply["state"] = session.snapshot()
+    return reply
+
+
+def _warm_generators():
+    # Builds (or maps from disk) the tables the first hard challenges would otherwise build mid-request.
+    get_sieve()
+    from .triples import get_index
+    for settings in DIFFICULTY_SETTINGS.values():
+        if "triple_max_hypotenuse" in settings:
+            get_index(settings["triple_max_hypotenuse"])
+
+
+async def _send(writer, message):
+    writer.write(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+    await writer.drain() # Backpressure: wait until the client has taken the reply
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve AMC 8 Gauntlet sessions over line-delimited JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=600)
+    parser.add_argument("--db", help="SQLite file to keep player progress in")
+    parser.add_argument("--space", help="problem space file to draw challenges from")
+    parser.add_argument("--ratings-refresh", type=float, default=ITEM_RATINGS_REFRESH,
+                        help="seconds between reloads of the calibrated item ratings")
+    args = parser.parse_args(argv)
+
+    registry.load_packs()
+    store = PlayerStore(args.db) if args.db else None
+    source = generate_challenge_for_level
+    if args.space:
+        from .space import ProblemSpace # Needs NumPy, so only imported when asked for
+        source = ProblemSpace(args.space).sample_level
+    server = ChallengeServer(args.host, args.port, args.max_sessions, args.idle_timeout, store, source,
+                             args.ratings_refresh)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if store is not None:
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
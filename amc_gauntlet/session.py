@@ -0,0 +1,196 @@
+"""Per-player game session.
+
+A ``GameSession`` owns everything one player's game needs between actions:
+the ``Player``, the challenge on screen, whether it has been answered and the
+hint being shown. The pygame front end, the asyncio server and the headless
+tools all drive the game through these methods instead of module globals.
+With a ``PlayerStore`` the player is loaded by name and every answer and
+progress change is queued for saving. Each session remembers which challenges
+its player has seen and avoids showing them again, and missed challenges come
+back for spaced-repetition review between fresh ones. Challenge difficulty and
+level advancement follow the player's ``SkillModel`` ratings, and a
+``TopicMixer`` asks for the kinds of question the player gets wrong most. With an
+``EventLog`` every action and its outcome is recorded for replay.
+"""
+from .engine import LEVELS, Player, check_answer, generate_challenge_for_level, generate_hint
+from .review import ReviewScheduler
+from .seen import SeenSet, UniqueChallengeSource
+from .skill import MASTERY_SUCCESS, SkillModel, TopicMixer
+
+SEEN_EXACT_LIMIT = 8192 # Keys kept exactly before older ones move into a Bloom filter
+REVIEW_SPACING = 2 # At least this many fresh challenges between two reviews
+
+
+class SessionError(Exception):
+    pass
+
+
+class GameSession:
+    def __init__(self, name, challenge_source=generate_challenge_for_level, player=None, store=None, item_ratings=None,
+                 log=None):
+        if player is None and store is not None:
+            player = store.load(name)
+        if item_ratings is None and store is not None:
+            item_ratings = store.item_ratings()
+        self.player = player if player is not None else Player(name)
+        self.store = store
+        self.skill = SkillModel(self.player.skill_ratings, item_ratings)
+        self.mixer = TopicMixer(self.skill)
+        self.reviews = ReviewScheduler(self.player.reviews)
+        self.current_challenge = None
+        self.answer_submitted = False
+        self.hint_message = ""
+        self._review = None # (level it is filed under, scheduler entry) when the current challenge is a review
+        self._fresh_since_review = REVIEW_SPACING
+        self._challenge_source = UniqueChallengeSource(challenge_source, SeenSet(exact_limit=SEEN_EXACT_LIMIT))
+        self.log = log
+        if log is not None:
+            log.start(self.player, self.skill.item_ratings)
+
+    @property
+    def exhausted_topics(self):
+        # Topics this player has seen every question of (for the current level or earlier ones).
+        return sorted({topic for _, topic in self._challenge_source.exhausted})
+
+    def next_difficulty(self):
+        return self.skill.choose_difficulty(self.player.get_current_level_name())
+
+    def mastery(self):
+        return self.skill.mastery(self.player.get_current_level_name())
+
+    def can_advance(self):
+        return self.skill.mastered(self.player.get_current_level_name())
+
+    def start_challenge(self):
+        self._requeue_review()
+        due = None
+        if self._fresh_since_review >= REVIEW_SPACING:
+            due = self.reviews.next_due()
+        if due is not None:
+            challenge, review_level, entry = due
+            self.current_challenge = challenge
+            self._review = (review_level, entry)
+            self._fresh_since_review = 0
+        else:
+            level = self.player.get_current_level_name()
+            difficulty = self.skill.choose_difficulty(level)
+            self.current_challenge = self._challenge_source(level, difficulty, self.mixer.choose(level, difficulty))
+            self._fresh_since_review += 1
+        self.answer_submitted = False
+        self.hint_message = ""
+        if self.log is not None:
+            self.log.challenge(self.current_challenge, self._review[0] if self._review is not None else None)
+        return self.current_challenge
+
+    def leave_challenge(self):
+        if self.log is not None:
+            self.log.leave()
+        self._requeue_review()
+        self.current_challenge = None
+        self.answer_submitted = False
+        self.hint_message = ""
+
+    def submit(self, text):
+        challenge = self.current_challenge
+        if challenge is None or self.answer_submitted:
+            raise SessionError("No challenge is waiting for an answer")
+
+        is_correct = check_answer(challenge, text)
+        if is_correct:
+            feedback = "Correct!"
+            self.player.add_skill_token(challenge.skill_token)
+            self.player.correct_streak += 1
+        else:
+            feedback = f"Incorrect. Answer was: {challenge.answer}"
+            self.player.correct_streak = 0
+        if self._review is not None:
+            # Reviews count towards the level they were missed in, which may be behind the player.
+            review_level, entry = self._review
+            self.skill.update(review_level, challenge, is_correct)
+            self.reviews.answered(review_level, entry, is_correct)
+            self._review = None
+        else:
+            level_name = self.player.get_current_level_name()
+            self.skill.update(level_name, challenge, is_correct)
+            if not is_correct:
+                self.reviews.miss(challenge, level_name)
+        self.mixer.update(challenge.topic)
+
+        self.answer_submitted = True
+        self.hint_message = "" # Clear hint after submission
+        if self.store is not None:
+            self.store.record_answer(self.player, challenge, text, is_correct)
+        if self.log is not None:
+            self.log.submit(text, is_correct)
+        return is_correct, feedback
+
+    def use_hint(self):
+        hint = self._use_hint()
+        if self.log is not None:
+            self.log.hint(hint) # Refused hints are logged too, so replay checks them
+        return hint
+
+    def _use_hint(self):
+        challenge = self.current_challenge
+        if challenge is None or challenge.hint_given or self.answer_submitted:
+            return None
+        if not self.player.use_power_up("Hint Helper"):
+            return None
+        self.hint_message = challenge.hint or generate_hint(challenge)
+        challenge.hint_given = True # Set flag so hint cannot be given again for this challenge
+        self._save()
+        return self.hint_message
+
+    def advance_level(self):
+        # Returns ("advanced" | "won" | "locked", message).
+        result, message = self._advance_level()
+        if self.log is not None:
+            self.log.advance(result)
+        return result, message
+
+    def _advance_level(self):
+        player = self.player
+        if not self.can_advance():
+            return "locked", f"Mastery {self.mastery():.0%} - reach {MASTERY_SUCCESS:.0%} to advance!"
+
+        player.level_progress[player.get_current_level_name()] = True
+        if player.current_level_idx == len(LEVELS) - 1:
+            self._save()
+            return "won", f"Congratulations, {player.name}!"
+        player.current_level_idx += 1
+        player.correct_streak = 0
+        self._save()
+        return "advanced", f"Entering {player.get_current_level_name()}!"
+
+    def _requeue_review(self):
+        # A review left unanswered keeps its place in the queue.
+        if self._review is not None:
+            if not self.answer_submitted:
+                self.reviews.requeue(*self._review)
+            self._review = None
+
+    def _save(self):
+        if self.store is not None:
+            self.store.save(self.player)
+
+    def snapshot(self):
+        challenge = self.current_challenge
+        player = self.player.to_dict()
+        del player["reviews"] # Only the server needs the queue
+        return {
+            "player": player,
+            "challenge": None if challenge is None else {
+                "level": challenge.level,
+                "topic": challenge.topic,
+                "question": challenge.question,
+                "skill_token": challenge.skill_token,
+                "difficulty": challenge.difficulty,
+                "hint_given": challenge.hint_given,
+                "review": self._review is not None,
+            },
+            "answer_submitted": self.answer_submitted,
+            "hint": self.hint_message,
+            "exhausted_topics": self.exhausted_topics,
+            "mastery": self.mastery(),
+            "can_advance": self.can_advance(),
+        }
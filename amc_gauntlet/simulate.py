@@ -0,0 +1,201 @@
+"""Headless bot-player simulation and load harness.
+
+Scripted bots play through every level with a ``GameSession``, the same
+rules the pygame front end and the server use: draw a challenge (fresh or a
+due review), optionally ask for a hint, answer, and advance once the level is
+mastered. Reviews run on a simulated clock of ``SECONDS_PER_CHALLENGE`` per
+challenge. A bot's ``accuracy`` is its chance of answering a medium question;
+easier and harder questions shift it on the skill model's logistic scale.
+Bots are spread over a process pool. The report covers generator throughput, hint
+and answer-submit latency, and how many challenges each level took to pass.
+
+    python -m amc_gauntlet.simulate --bots 2000 --accuracy 0.7,0.9 --workers 8
+"""
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from math import log
+
+from .engine import LEVELS, generate_challenge_for_level, generate_hint
+from .plugins import registry
+from .session import GameSession
+from .skill import success_probability
+
+SECONDS_PER_CHALLENGE = 30
+
+
+class _TimedSource:
+    # Challenge source for a bot's GameSession: generates as the game does and times every call.
+    def __init__(self, samples_ns):
+        self.samples_ns = samples_ns
+
+    def __call__(self, level_name, difficulty="medium", kind=None):
+        start = time.perf_counter_ns()
+        challenge = generate_challenge_for_level(level_name, difficulty, kind)
+        self.samples_ns.append(time.perf_counter_ns() - start)
+        return challenge
+
+
+def run_bot(bot_id, accuracy, hint_rate=0.2, seed=0, max_challenges=500):
+    random.seed(f"{seed}:{bot_id}")
+    generate_ns = []
+    hint_ns = []
+    submit_ns = []
+    challenges_per_level = {}
+    session = GameSession(f"bot-{bot_id}", _TimedSource(generate_ns))
+    clock = [0.0]
+    session.reviews.clock = lambda: clock[0] # Simulated time, so missed challenges come back for review
+    accuracy = min(max(accuracy, 0.001), 0.999)
+    ability = log(accuracy / (1 - accuracy)) # Bot's true ability on the skill model's scale
+
+    while True:
+        level_name = session.player.get_current_level_name()
+        attempts = 0
+        while not session.can_advance() and attempts < max_challenges:
+            attempts += 1
+            clock[0] += SECONDS_PER_CHALLENGE
+            challenge = session.start_challenge()
+
+            if random.random() < hint_rate:
+                start = time.perf_counter_ns()
+                if session.use_hint() is None:
+                    # Out of Hint Helpers: still time a hint, since this is a load test.
+                    generate_hint(challenge)
+                hint_ns.append(time.perf_counter_ns() - start)
+
+            item_rating = session.skill.item_rating(challenge.topic, challenge.difficulty)
+            knows_it = random.random() < success_probability(ability, item_rating)
+            answer = challenge.answer if knows_it else challenge.answer + "1"
+            start = time.perf_counter_ns()
+            session.submit(answer)
+            submit_ns.append(time.perf_counter_ns() - start)
+
+        result, _ = session.advance_level()
+        if result == "locked":
+            challenges_per_level[level_name] = None # Gave up on this level
+            break
+        challenges_per_level[level_name] = attempts
+        if result == "won":
+            break
+
+    return {
+        "generate_ns": generate_ns,
+        "hint_ns": hint_ns,
+        "submit_ns": submit_ns,
+        "challenges_per_level": challenges_per_level,
+    }
+
+
+def _run_bots(job):
+    bot_ids, accuracies, hint_rate, seed, max_challenges = job
+    return [run_bot(bot_id, accuracies[bot_id % len(accuracies)], hint_rate, seed, max_challenges)
+            for bot_id in bot_ids]
+
+
+def run_simulation(bots=1000, accuracies=(0.8,), hint_rate=0.2, workers=None, seed=0, max_challenges=500):
+    registry.load_packs()
+    chunk_size = max(1, bots // ((workers or 4) * 4))
+    jobs = [(range(start, min(start + chunk_size, bots)), tuple(accuracies), hint_rate, seed, max_challenges)
+            for start in range(0, bots, chunk_size)]
+
+    generate_ns = []
+    hint_ns = []
+    submit_ns = []
+    per_level = {level: [] for level in LEVELS}
+    gave_up = {level: 0 for level in LEVELS}
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=registry.load_packs) as pool: # Workers need the same levels
+        for results in pool.map(_run_bots, jobs):
+            for result in results:
+                generate_ns += result["generate_ns"]
+                hint_ns += result["hint_ns"]
+                submit_ns += result["submit_ns"]
+                for level, attempts in result["challenges_per_level"].items():
+                    if attempts is None:
+                        gave_up[level] += 1
+                    else:
+                        per_level[level].append(attempts)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "bots": bots,
+        "elapsed_s": elapsed,
+        "challenges": len(submit_ns),
+        "generator_throughput": len(generate_ns) / (sum(generate_ns) / 1e9) if generate_ns else 0.0,
+        "generate_us": _latency_summary(generate_ns),
+        "hint_us": _latency_summary(hint_ns),
+        "submit_us": _latency_summary(submit_ns),
+        "challenges_to_pass": {level: _distribution(per_level[level]) for level in LEVELS},
+        "gave_up": gave_up,
+    }
+
+
+def _latency_summary(samples_ns):
+    if len(samples_ns) < 2:
+        return None
+    cuts = statistics.quantiles(samples_ns, n=100)
+    return {
+        "mean": statistics.fmean(samples_ns) / 1000,
+        "p50": cuts[49] / 1000,
+        "p95": cuts[94] / 1000,
+        "p99": cuts[98] / 1000,
+    }
+
+
+def _distribution(values):
+    if len(values) < 2:
+        return None
+    cuts = statistics.quantiles(values, n=10)
+    return {
+        "n": len(values),
+        "mean": statistics.fmean(values),
+        "p50": statistics.median(values),
+        "p90": cuts[8],
+        "max": max(values),
+    }
+
+
+def format_report(report):
+    lines = [
+        f"{report['bots']} bots, {report['challenges']} challenges in {report['elapsed_s']:.2f}s wall",
+        f"Generator throughput: {report['generator_throughput']:,.0f} challenges/s per core",
+    ]
+    for label, key in (("generate", "generate_us"), ("hint", "hint_us"), ("submit", "submit_us")):
+        summary = report[key]
+        if summary:
+            lines.append(f"{label:>8} latency (us): mean {summary['mean']:.1f}  p50 {summary['p50']:.1f}  "
+                         f"p95 {summary['p95']:.1f}  p99 {summary['p99']:.1f}")
+    lines.append("Challenges needed to pass:")
+    for level in LEVELS:
+        dist = report["challenges_to_pass"][level]
+        gave_up = report["gave_up"][level]
+        if dist:
+            lines.append(f"  {level:<32} n={dist['n']:<6} mean {dist['mean']:.1f}  p50 {dist['p50']:.0f}  "
+                         f"p90 {dist['p90']:.0f}  max {dist['max']}  gave up {gave_up}")
+        else:
+            lines.append(f"  {level:<32} no data  gave up {gave_up}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate bot players against the AMC 8 Gauntlet engine.")
+    parser.add_argument("--bots", type=int, default=1000)
+    parser.add_argument("--accuracy", default="0.8",
+                        help="comma-separated chances of answering a medium question, assigned to bots round-robin")
+    parser.add_argument("--hint-rate", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-challenges", type=int, default=500,
+                        help="challenges per level before a bot gives up")
+    args = parser.parse_args(argv)
+
+    accuracies = [float(value) for value in args.accuracy.split(",")]
+    report = run_simulation(args.bots, accuracies, args.hint_rate, args.workers, args.seed, args.max_challenges)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
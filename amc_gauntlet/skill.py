@@ -0,0 +1,131 @@
+"""Online per-player skill model.
+
+Each player has an ability rating per topic and per level; each
+(topic, difficulty) pair has an item difficulty rating on the same scale.
+The chance of a correct answer is the Rasch/Elo logistic
+
+    P(correct) = 1 / (1 + exp(item_rating - ability))
+
+After every answer both the topic and level abilities move by
+``k * (outcome - P)``, an O(1) update. ``k`` starts large and shrinks as a
+rating collects answers, so new players converge within a few questions.
+
+The next challenge is generated at whichever difficulty gives an expected
+success rate closest to ``TARGET_SUCCESS``, and a level counts as mastered
+once the player is predicted to answer a medium question there with
+probability ``MASTERY_SUCCESS``. A level's rating at a difficulty is the mean
+item rating of the topics it asks about. Compared with requiring 5 correct answers in
+a row, strong players advance sooner and lucky streaks no longer pass a
+level. Item ratings default to -1/0/+1 for easy/medium/hard until
+``amc_gauntlet.calibrate`` refits them from everyone's answer history.
+
+``TopicMixer`` uses the same ratings to choose which kind of question a level
+asks next: each kind is weighted by the player's predicted error rate on its
+topics, so weak topics come up more often and mastered ones still
+occasionally.
+"""
+from math import exp
+
+from .engine import DIFFICULTIES
+from .plugins import registry
+from .sampling import AliasSampler
+
+DEFAULT_ITEM_RATINGS = {"easy": -1.0, "medium": 0.0, "hard": 1.0}
+TARGET_SUCCESS = 0.7
+MASTERY_SUCCESS = 0.7
+MIN_MASTERY_ANSWERS = 4
+K_START = 2.0
+K_MIN = 0.3
+K_DECAY = 0.5 # How quickly k shrinks with the number of answers
+MIN_KIND_WEIGHT = 0.1 # Weight of a kind the player never gets wrong
+
+
+def success_probability(ability, item_rating):
+    return 1.0 / (1.0 + exp(item_rating - ability))
+
+
+class SkillModel:
+    def __init__(self, ratings, item_ratings=None):
+        self.ratings = ratings # topic or level name -> [ability, answers]; the Player's own dict
+        self.item_ratings = item_ratings if item_ratings is not None else {} # (topic, difficulty) -> rating
+        self._level_ratings = {} # (level, difficulty) -> mean item rating of its topics; item_ratings must not change
+
+    def ability(self, name):
+        return self.ratings.get(name, (0.0, 0))[0]
+
+    def answers(self, name):
+        return self.ratings.get(name, (0.0, 0))[1]
+
+    def item_rating(self, topic, difficulty):
+        return self.item_ratings.get((topic, difficulty), DEFAULT_ITEM_RATINGS[difficulty])
+
+    def level_item_rating(self, level_name, difficulty):
+        key = (level_name, difficulty)
+        rating = self._level_ratings.get(key)
+        if rating is None:
+            topics = {topic for topics in registry.kinds(level_name, difficulty).values() for topic in topics}
+            if topics:
+                rating = sum(self.item_rating(topic, difficulty) for topic in topics) / len(topics)
+            else: # Levels that do not list their kinds
+                rating = DEFAULT_ITEM_RATINGS[difficulty]
+            self._level_ratings[key] = rating
+        return rating
+
+    def update(self, level_name, challenge, correct):
+        # level_name is the level being played, which for the Pinnacle differs from challenge.level.
+        item_rating = self.item_rating(challenge.topic, challenge.difficulty)
+        for name in (challenge.topic, level_name):
+            ability, answers = self.ratings.get(name, (0.0, 0))
+            k = max(K_MIN, K_START / (1 + K_DECAY * answers))
+            ability += k * ((1.0 if correct else 0.0) - success_probability(ability, item_rating))
+            self.ratings[name] = [ability, answers + 1]
+
+    def choose_difficulty(self, level_name):
+        # The level rating stands in for the topic, which is only known once the challenge is generated.
+        ability = self.ability(level_name)
+        return min(DIFFICULTIES, key=lambda difficulty: abs(
+            success_probability(ability, self.level_item_rating(level_name, difficulty)) - TARGET_SUCCESS))
+
+    def mastery(self, level_name):
+        # Predicted chance of answering a medium question at this level.
+        return success_probability(self.ability(level_name), self.level_item_rating(level_name, "medium"))
+
+    def mastered(self, level_name):
+        return self.answers(level_name) >= MIN_MASTERY_ANSWERS and self.mastery(level_name) >= MASTERY_SUCCESS
+
+
+class TopicMixer:
+    def __init__(self, skill):
+        self.skill = skill
+        self._samplers = {} # (level, difficulty) -> AliasSampler over the level's kinds, or None
+        self._by_topic = {} # topic -> [(sampler, kind index, kind topics, difficulty)]
+
+    def kind_weight(self, topics, difficulty):
+        # Mean predicted error rate over the kind's topics.
+        skill = self.skill
+        error = sum(1.0 - success_probability(skill.ability(topic), skill.item_rating(topic, difficulty))
+                    for topic in topics) / len(topics)
+        return max(MIN_KIND_WEIGHT, error)
+
+    def choose(self, level_name, difficulty):
+        # A kind for registry.kinds(level_name, difficulty), or None if the level has none.
+        key = (level_name, difficulty)
+        sampler = self._samplers.get(key, False)
+        if sampler is False:
+            sampler = self._samplers[key] = self._build(level_name, difficulty)
+        return None if sampler is None else sampler.sample()
+
+    def _build(self, level_name, difficulty):
+        kinds = registry.kinds(level_name, difficulty)
+        if not kinds:
+            return None
+        sampler = AliasSampler(kinds, [self.kind_weight(topics, difficulty) for topics in kinds.values()])
+        for i, topics in enumerate(kinds.values()):
+            for topic in topics:
+                self._by_topic.setdefault(topic, []).append((sampler, i, topics, difficulty))
+        return sampler
+
+    def update(self, topic):
+        # Call after the topic's rating changes; only the kinds covering it are reweighted.
+        for sampler, i, topics, difficulty in self._by_topic.get(topic, ()):
+            sampler.reweight(i, self.kind_weight(topics, difficulty))
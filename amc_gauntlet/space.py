@@ -0,0 +1,233 @@
+"""Exhaustive, memory-mapped index of every distinct problem.
+
+At medium difficulty each branch of the scalar generators draws from a small
+finite parameter space. ``build_space(path)`` enumerates every distinct parameter tuple of
+every problem kind, computes the answers with the same vectorized code as
+``amc_gauntlet.batch`` and writes them, grouped by topic, to one binary file:
+
+    b"AMCSPACE", u32 header length, JSON header, padding to 8 bytes,
+    kinds int8[n] (padded), params int32[n, 5], numerators int32[n],
+    denominators int32[n]
+
+The header records each topic's row range. ``ProblemSpace(path)`` maps the
+file read-only with ``mmap`` and wraps the arrays as a ``ChallengeBatch``
+without copying, so opening it costs next to nothing and every server worker
+on the machine shares the same pages. Sampling a topic is uniform over its
+distinct problems and O(1).
+
+    python -m amc_gauntlet.space build problems.bin
+    python -m amc_gauntlet.space stats problems.bin
+"""
+import argparse
+import itertools
+import json
+import mmap
+import random
+import struct
+
+import numpy as np
+
+from .batch import (
+    EXPRESSION_OPS,
+    EXPRESSION_VARS,
+    KIND_CODES,
+    KINDS,
+    LEVEL_KIND_WEIGHTS,
+    MAX_PARAMS,
+    PRIMES_FROM_13,
+    PYTHAGOREAN_TRIPLES,
+    SMALL_PRIMES,
+    ChallengeBatch,
+    kind_answers,
+)
+from .engine import generate_challenge_for_level
+from .plugins import registry
+
+MAGIC = b"AMCSPACE"
+VERSION = 1
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+# --- Parameter Spaces ---
+# Each function lists every distinct parameter tuple its kind can produce.
+
+def _gcd_lcm_operands():
+    values = sorted({k * m for k in range(5, 21) for m in (2, 3, 5)})
+    return list(itertools.product(values, values))
+
+def _prime_factor_params():
+    rows = []
+    for p in PRIMES_FROM_13.tolist():
+        for count in (1, 2, 3):
+            for factors in itertools.combinations_with_replacement(SMALL_PRIMES.tolist(), count):
+                rows.append((p * int(np.prod(factors)), p))
+    return rows
+
+def _scaled_triples():
+    return [tuple(int(side) * k for side in triple) for triple in PYTHAGOREAN_TRIPLES for k in (1, 2, 3)]
+
+def _linear_equations():
+    rows = set()
+    for a in range(2, 6):
+        for b in range(-10, 11):
+            rows.update((a, b, c) for c in range(-20, 21) if (c - b) % a == 0)
+            rows.update((a, b, a * k + b) for k in range(-5, 6)) # The generator's fallback when c does not divide
+    return sorted(rows)
+
+_KIND_SPACES = {
+    "remainder": lambda: list(itertools.product(range(50, 301), range(2, 14))),
+    "largest_prime_factor": _prime_factor_params,
+    "gcd": _gcd_lcm_operands,
+    "lcm": _gcd_lcm_operands,
+    "rectangle_area": lambda: list(itertools.product(range(5, 16), range(3, 11))),
+    "rectangle_perimeter": lambda: list(itertools.product(range(5, 16), range(3, 11))),
+    "square_area": lambda: [(side,) for side in range(4, 13)],
+    "square_perimeter": lambda: [(side,) for side in range(4, 13)],
+    "complementary": lambda: [(angle,) for angle in range(10, 81)],
+    "supplementary": lambda: [(angle,) for angle in range(10, 81)],
+    "hypotenuse": _scaled_triples,
+    "leg_given_a": lambda: [(a, b, c, a) for a, b, c in _scaled_triples()],
+    "leg_given_b": lambda: [(a, b, c, b) for a, b, c in _scaled_triples()],
+    "linear_equation": _linear_equations,
+    "word_problem": lambda: list(itertools.product(range(5, 16), range(2, 9))),
+    "expression_eval": lambda: list(itertools.product(range(len(EXPRESSION_VARS)), range(2, 11),
+                                                      range(len(EXPRESSION_OPS)), range(1, 6), range(1, 11))),
+    "permutations": lambda: [(n,) for n in range(3, 6)],
+    "die_number": lambda: [(sides, target) for sides in (4, 6, 8, 10) for target in range(1, sides + 1)],
+    "die_even": lambda: [(sides,) for sides in (4, 6, 8, 10)],
+    "die_odd": lambda: [(sides,) for sides in (4, 6, 8, 10)],
+    "coin_all_heads": lambda: [(2,), (3,)],
+    "coin_all_tails": lambda: [(2,), (3,)],
+    "coin_one_head": lambda: [(2,), (3,)],
+}
+
+
+# --- Build Step ---
+
+def _pad(length):
+    return -length % 8
+
+def build_space(path):
+    topics = {} # topic -> [start, count], in KINDS order
+    kinds, params, numerators, denominators = [], [], [], []
+    rows = 0
+    by_topic = {}
+    for name, _, topic, _, _ in KINDS:
+        by_topic.setdefault(topic, []).append(name)
+
+    for topic, names in by_topic.items():
+        start = rows
+        for name in names:
+            p = np.array(_KIND_SPACES[name](), dtype=np.int64)
+            num, den = kind_answers(name, p)
+            block = np.zeros((len(p), MAX_PARAMS), dtype=np.int32)
+            block[:, :p.shape[1]] = p
+            kinds.append(np.full(len(p), KIND_CODES[name], dtype=np.int8))
+            params.append(block)
+            numerators.append(np.asarray(num, dtype=np.int32))
+            denominators.append(np.zeros(len(p), dtype=np.int32) if den is None else np.asarray(den, dtype=np.int32))
+            rows += len(p)
+        topics[topic] = [start, rows - start]
+
+    header = json.dumps({"version": VERSION, "rows": rows, "topics": topics}).encode("utf-8")
+    kinds = np.concatenate(kinds)
+    with open(path, "wb") as f:
+        f.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+        f.write(bytes(_pad(len(MAGIC) + _HEADER_LENGTH.size + len(header))))
+        f.write(kinds.tobytes() + bytes(_pad(rows)))
+        f.write(np.concatenate(params).tobytes())
+        f.write(np.concatenate(numerators).tobytes())
+        f.write(np.concatenate(denominators).tobytes())
+    return {topic: count for topic, (_, count) in topics.items()}
+
+
+# --- Runtime Access ---
+
+class ProblemSpace:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a problem space file")
+        offset = len(MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, offset)
+        offset += _HEADER_LENGTH.size
+        header = json.loads(self._mmap[offset:offset + header_length])
+        if header["version"] != VERSION:
+            raise ValueError(f"{path} has unsupported version {header['version']}")
+        offset += header_length
+        offset += _pad(offset)
+
+        rows = header["rows"]
+        self._topics = {topic: tuple(span) for topic, span in header["topics"].items()}
+        kinds = np.frombuffer(self._mmap, np.int8, rows, offset)
+        offset += rows + _pad(rows)
+        params = np.frombuffer(self._mmap, np.int32, rows * MAX_PARAMS, offset).reshape(rows, MAX_PARAMS)
+        offset += params.nbytes
+        numerators = np.frombuffer(self._mmap, np.int32, rows, offset)
+        offset += numerators.nbytes
+        denominators = np.frombuffer(self._mmap, np.int32, rows, offset)
+        self.rows = ChallengeBatch(kinds, params, numerators, denominators)
+
+        # Topic probabilities per level, from the generators' kind weights.
+        self._level_topics = {}
+        for level, weights in LEVEL_KIND_WEIGHTS.items():
+            topic_weights = {}
+            for name, weight in weights.items():
+                topic = KINDS[KIND_CODES[name]][2]
+                topic_weights[topic] = topic_weights.get(topic, 0) + weight
+            self._level_topics[level] = (list(topic_weights), list(topic_weights.values()))
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def counts(self):
+        return {topic: count for topic, (_, count) in self._topics.items()}
+
+    def challenge(self, topic, i):
+        start, count = self._topics[topic]
+        if not 0 <= i < count:
+            raise IndexError(f"{topic} has {count} problems")
+        return self.rows[start + i]
+
+    def sample(self, topic, rng=random):
+        start, count = self._topics[topic]
+        return self.rows[start + rng.randrange(count)]
+
+    def sample_level(self, level_name, difficulty="medium", kind=None, rng=random):
+        # Topic drawn with the generator's probabilities (among the kind's
+        # topics, if one is given), then a uniform problem from it. The file
+        # holds the built-in medium problems; other difficulties and pack
+        # levels are generated on the fly.
+        if difficulty != "medium" or level_name not in self._level_topics:
+            return generate_challenge_for_level(level_name, difficulty, kind)
+        topics, weights = self._level_topics[level_name]
+        if kind is not None:
+            kind_topics = registry.kinds(level_name, difficulty).get(kind, ())
+            weights = [weight if topic in kind_topics else 0 for topic, weight in zip(topics, weights)]
+            if not any(weights): # e.g. a Pinnacle kind for a pack level
+                return generate_challenge_for_level(level_name, difficulty, kind)
+        return self.sample(rng.choices(topics, weights)[0], rng)
+
+    def close(self):
+        self.rows = None # Drop the buffer views before unmapping
+        self._mmap.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the problem space file.")
+    parser.add_argument("command", choices=["build", "stats"])
+    parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        build_space(args.path)
+    space = ProblemSpace(args.path)
+    for topic, count in space.counts.items():
+        print(f"{topic:<24} {count:>6}")
+    print(f"{'Total':<24} {len(space):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Index of Pythagorean triples up to a hypotenuse bound.
+
+Every primitive triple comes from Euclid's formula (m² - n², 2mn, m² + n²)
+with m > n > 0 coprime and of opposite parity; its multiples are added up to
+the bound. Rows live in ``array('I')`` columns sorted by hypotenuse, with
+each row's scale and the row of its primitive triple, so a bound of 2000
+(about 2000 triples) takes about 70 KB and a bound of 10**6 a few tens
+of MB.
+
+Two CSR-style offset tables index the rows by hypotenuse and by leg, so
+picking a random triple, listing the triangles with a given hypotenuse or
+leg, and counting them are all O(1) lookups (plus the length of the answer).
+Generators put the row's sides, scale and primitive triple into the
+challenge params, so hints and answer checking never recompute anything.
+"""
+import random
+from array import array
+from functools import lru_cache
+from math import gcd, isqrt
+
+
+class TripleIndex:
+    def __init__(self, max_hypotenuse):
+        self.max_hypotenuse = max_hypotenuse
+        rows = []
+        for m in range(2, isqrt(max_hypotenuse) + 1):
+            for n in range(1 + m % 2, m, 2): # Opposite parity
+                if gcd(m, n) != 1:
+                    continue
+                a, b, c = m * m - n * n, 2 * m * n, m * m + n * n
+                if c > max_hypotenuse:
+                    break
+                a, b = min(a, b), max(a, b)
+                for k in range(1, max_hypotenuse // c + 1):
+                    rows.append((k * c, k * a, k * b, k))
+        rows.sort()
+
+        self.a = array("I", [row[1] for row in rows])
+        self.b = array("I", [row[2] for row in rows])
+        self.c = array("I", [row[0] for row in rows])
+        self.scale = array("I", [row[3] for row in rows])
+        self.primitive = array("I", bytes(4 * len(rows))) # Row of the primitive triple each row is a multiple of
+        primitive_rows = {}
+        for i, (c, a, b, k) in enumerate(rows):
+            if k == 1:
+                primitive_rows[a, b] = i
+            self.primitive[i] = primitive_rows[a // k, b // k] # Primitive triples sort before their multiples
+
+        self._by_hypotenuse = self._offsets(self.c)
+        legs = sorted((leg, i) for i in range(len(rows)) for leg in (self.a[i], self.b[i]))
+        self._leg_rows = array("I", [i for _, i in legs])
+        self._by_leg = self._offsets(array("I", [leg for leg, _ in legs]))
+
+        # Legs whose triangles all fit under the bound, so counting them is exact.
+        # The largest hypotenuse with leg L is (L² + 1) / 2 for odd L and L² / 4 + 1 for even L.
+        self.complete_legs = array("I", [leg for leg in range(3, isqrt(2 * max_hypotenuse) + 1)
+                                          if self.count_with_leg(leg) and self._largest_hypotenuse(leg) <= max_hypotenuse])
+
+    def _offsets(self, keys):
+        # offsets[v]:offsets[v + 1] are the positions of value v in the sorted keys.
+        offsets = array("I", bytes(4 * (self.max_hypotenuse + 2)))
+        for key in keys:
+            offsets[key + 1] += 1
+        for v in range(1, len(offsets)):
+            offsets[v] += offsets[v - 1]
+        return offsets
+
+    @staticmethod
+    def _largest_hypotenuse(leg):
+        return (leg * leg + 1) // 2 if leg % 2 else leg * leg // 4 + 1
+
+    def __len__(self):
+        return len(self.c)
+
+    def __getitem__(self, i):
+        return self.a[i], self.b[i], self.c[i]
+
+    def sample(self, rng=random):
+        # A uniformly random row number.
+        return rng.randrange(len(self.c))
+
+    def primitive_triple(self, i):
+        return self[self.primitive[i]]
+
+    def with_hypotenuse(self, c):
+        if not 0 < c <= self.max_hypotenuse:
+            return []
+        return [self[i] for i in range(self._by_hypotenuse[c], self._by_hypotenuse[c + 1])]
+
+    def with_leg(self, leg):
+        if not 0 < leg <= self.max_hypotenuse:
+            return []
+        return [self[self._leg_rows[j]] for j in range(self._by_leg[leg], self._by_leg[leg + 1])]
+
+    def count_with_leg(self, leg):
+        if not 0 < leg <= self.max_hypotenuse:
+            return 0
+        return self._by_leg[leg + 1] - self._by_leg[leg]
+
+    def is_triple(self, a, b, c):
+        return (min(a, b), max(a, b), c) in self.with_hypotenuse(c)
+
+    def nbytes(self):
+        columns = (self.a, self.b, self.c, self.scale, self.primitive, self._by_hypotenuse, self._leg_rows,
+                   self._by_leg, self.complete_legs)
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+@lru_cache(maxsize=4)
+def get_index(max_hypotenuse):
+    return TripleIndex(max_hypotenuse)
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from amc_gauntlet.answers import MAX_INPUT_LENGTH, InvalidAnswer, check_answer, parse_answer
+from amc_gauntlet.engine import DIFFICULTIES, LEVELS, Challenge, generate_challenge_for_level
+from amc_gauntlet.plugins import registry
+
+
+def challenge_with_answer(answer):
+    return Challenge("Algebra Arena", "Expression Evaluation", "?", answer, "Algebraic Thinking")
+
+
+@pytest.mark.parametrize("text", ["9**9**9", "9^9^9", "1/0", "1e5", "2**-1**0.5", "1" * (MAX_INPUT_LENGTH + 1),
+                                  "(" * MAX_INPUT_LENGTH, "__import__('os')"])
+def test_hostile_input_is_rejected_without_raising(text):
+    with pytest.raises(InvalidAnswer):
+        parse_answer(text)
+    assert check_answer(challenge_with_answer("100000"), text) is False
+
+
+def test_equal_values_in_different_forms_match():
+    assert check_answer(challenge_with_answer("0.5"), "2/4")
+    assert check_answer(challenge_with_answer("1/2"), " 0.5 ")
+    assert check_answer(challenge_with_answer("8"), "2^3")
+    assert not check_answer(challenge_with_answer("0.5"), "0.51")
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+@pytest.mark.parametrize("level", LEVELS)
+def test_every_generated_answer_checks_as_correct(level, difficulty):
+    random.seed(f"{level}:{difficulty}")
+    kinds = [None, *registry.kinds(level, difficulty)]
+    for kind in kinds:
+        for _ in range(50):
+            challenge = generate_challenge_for_level(level, difficulty, kind)
+            assert check_answer(challenge, challenge.answer), (challenge.question, challenge.answer)
@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from amc_gauntlet.engine import Challenge
+from amc_gauntlet.eventlog import EventLog, replay
+from amc_gauntlet.session import GameSession
+from amc_gauntlet.skill import DEFAULT_ITEM_RATINGS
+
+
+def record(path, item_ratings, seed=7, challenges=60):
+    random.seed(seed)
+    log = EventLog(path, seed)
+    session = GameSession("Replay", item_ratings=item_ratings, log=log)
+    for i in range(challenges):
+        challenge = session.start_challenge()
+        session.submit(challenge.answer if i % 3 else "wrong")
+        session.advance_level()
+    log.close()
+
+
+def test_replay_matches_with_calibrated_item_ratings(tmp_path):
+    # Harder-than-default items make correct answers count for more, so the
+    # first level is passed at a different point than with the defaults.
+    topics = ["Modular Arithmetic", "Prime Factors", "GCD Calculation", "LCM Calculation"]
+    item_ratings = {(topic, difficulty): DEFAULT_ITEM_RATINGS[difficulty] + 2.5
+                    for topic in topics for difficulty in DEFAULT_ITEM_RATINGS}
+    path = str(tmp_path / "session.log")
+    record(path, item_ratings)
+
+    stats = replay(path)
+    assert stats["sessions"] == 1
+    assert stats["mismatches"] == 0
+
+
+def test_oversized_record_is_refused_not_truncated(tmp_path):
+    path = str(tmp_path / "session.log")
+    log = EventLog(path, 1)
+    with pytest.raises(ValueError):
+        log.challenge(Challenge("Number Theory Nexus", "Prime Factors", "x" * 70000, "2", "Number Sense Navigator"))
+    log.close()
+    assert replay(path)["mismatches"] == 0
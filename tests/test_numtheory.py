@@ -0,0 +1,69 @@
+import pytest
+
+from amc_gauntlet import numtheory
+from amc_gauntlet.numtheory import Sieve
+
+LIMIT = 10 ** 4
+
+
+def trial_division(n):
+    factors = []
+    p = 2
+    while p * p <= n:
+        exponent = 0
+        while n % p == 0:
+            n //= p
+            exponent += 1
+        if exponent:
+            factors.append((p, exponent))
+        p += 1
+    if n > 1:
+        factors.append((n, 1))
+    return tuple(factors)
+
+
+def check_sieve(sieve):
+    for n in range(1, LIMIT + 1):
+        expected = trial_division(n)
+        assert sieve.factorize(n) == expected, n
+        assert sieve.is_prime(n) == (expected == ((n, 1),)), n
+        if n > 1:
+            assert sieve.smallest_prime_factor(n) == expected[0][0], n
+
+
+def test_sieve_matches_trial_division():
+    sieve = Sieve.build(LIMIT)
+    check_sieve(sieve)
+    assert [sieve.factorize(2 ** k) for k in range(1, 14)] == [((2, k),) for k in range(1, 14)]
+    with pytest.raises(ValueError):
+        sieve.factorize(LIMIT + 1)
+
+
+def test_saved_sieve_reopens_with_the_same_table(tmp_path):
+    path = str(tmp_path / "sieve.bin")
+    Sieve.build(LIMIT).save(path)
+    sieve = Sieve.open(path)
+    try:
+        assert sieve.limit == LIMIT
+        check_sieve(sieve)
+    finally:
+        sieve.close()
+
+
+def test_divisor_functions_match_trial_division():
+    previous = numtheory._sieve
+    numtheory.use_sieve(Sieve.build(LIMIT))
+    try:
+        counts = [0] * (LIMIT + 1)
+        sums = [0] * (LIMIT + 1)
+        for d in range(1, LIMIT + 1): # Every multiple of d has d as a divisor
+            for multiple in range(d, LIMIT + 1, d):
+                counts[multiple] += 1
+                sums[multiple] += d
+        for n in range(1, LIMIT + 1):
+            assert numtheory.divisor_count(n) == counts[n], n
+            assert numtheory.divisor_sum(n) == sums[n], n
+        assert numtheory.largest_prime_factor(2 ** 13) == 2
+        assert numtheory.primes_up_to(30) == (2, 3, 5, 7, 11, 13, 17, 19, 23, 29)
+    finally:
+        numtheory.use_sieve(previous)
@@ -0,0 +1,79 @@
+from amc_gauntlet.engine import Challenge
+from amc_gauntlet.review import EXPIRE_AFTER, MAX_REVIEWS_PER_LEVEL, REVIEW_INTERVALS, ReviewScheduler
+
+LEVEL = "Algebra Arena"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def challenge(i):
+    return Challenge(LEVEL, "Linear Equations", f"Solve {i}x = {i}", "1", "Algebraic Thinking")
+
+
+def scheduler():
+    clock = Clock()
+    return ReviewScheduler({}, clock=clock), clock
+
+
+def test_correct_reviews_move_up_a_box_and_a_miss_resets_to_the_first():
+    reviews, clock = scheduler()
+    reviews.miss(challenge(1), LEVEL)
+    assert reviews.next_due() is None # Not due before the first interval
+
+    clock.now += REVIEW_INTERVALS[0]
+    for box in range(3):
+        due, level, entry = reviews.next_due()
+        assert (due.question, level, entry[1]) == ("Solve 1x = 1", LEVEL, box)
+        reviews.answered(level, entry, True)
+        clock.now += REVIEW_INTERVALS[box + 1] - 1
+        assert reviews.next_due() is None # The next box waits its full, longer interval
+        clock.now += 1
+
+    _, level, entry = reviews.next_due()
+    assert entry[1] == 3
+    reviews.answered(level, entry, False)
+    clock.now += REVIEW_INTERVALS[0]
+    _, _, entry = reviews.next_due()
+    assert entry[1] == 0 # Back in the first box
+
+
+def test_answering_right_after_the_last_interval_retires_the_item():
+    reviews, clock = scheduler()
+    reviews.miss(challenge(1), LEVEL)
+    for interval in REVIEW_INTERVALS:
+        clock.now += interval
+        _, level, entry = reviews.next_due()
+        reviews.answered(level, entry, True)
+    assert len(reviews) == 0
+    clock.now += EXPIRE_AFTER
+    assert reviews.next_due() is None
+
+
+def test_items_overdue_past_expiry_are_dropped():
+    reviews, clock = scheduler()
+    reviews.miss(challenge(1), LEVEL)
+    clock.now += 60
+    reviews.miss(challenge(2), LEVEL)
+    clock.now += REVIEW_INTERVALS[0] + EXPIRE_AFTER - 30 # Only the first miss is past expiry
+    due, _, _ = reviews.next_due()
+    assert due.question == "Solve 2x = 2"
+    assert len(reviews) == 0
+
+
+def test_a_full_level_evicts_the_item_due_last():
+    reviews, clock = scheduler()
+    for i in range(MAX_REVIEWS_PER_LEVEL):
+        reviews.miss(challenge(i), LEVEL)
+        clock.now += 1
+    reviews.miss(challenge(MAX_REVIEWS_PER_LEVEL), LEVEL) # Due last of all, but the newest item is kept
+    assert len(reviews) == MAX_REVIEWS_PER_LEVEL
+    questions = {entry[4] for entry in reviews.reviews[LEVEL]}
+    assert f"Solve {MAX_REVIEWS_PER_LEVEL}x = {MAX_REVIEWS_PER_LEVEL}" in questions
+    assert f"Solve {MAX_REVIEWS_PER_LEVEL - 1}x = {MAX_REVIEWS_PER_LEVEL - 1}" not in questions
+    assert "Solve 0x = 0" in questions
@@ -0,0 +1,28 @@
+import random
+
+from amc_gauntlet.engine import generate_challenge_for_level
+from amc_gauntlet.seen import SeenSet, UniqueChallengeSource
+
+COUNTING = "Counting & Probability Citadel"
+
+
+def test_keys_are_still_seen_after_spilling_into_the_bloom_filter():
+    seen = SeenSet(exact_limit=8, bloom_bits=1 << 12)
+    keys = [random.Random(i).getrandbits(64) | 1 for i in range(100)]
+    assert all(seen.add(key) for key in keys)
+    assert seen.bloom is not None
+    assert len(seen) == 100
+    assert all(key in seen for key in keys)
+    assert not any(seen.add(key) for key in keys)
+    assert seen.nbytes() < 8 * 64 + (1 << 12) // 8 + 1
+
+
+def test_topic_with_few_questions_is_reported_exhausted():
+    random.seed(3)
+    def coin_only(level_name, difficulty="medium", kind=None):
+        return generate_challenge_for_level(COUNTING, difficulty, "probability_coin")
+    source = UniqueChallengeSource(coin_only, SeenSet())
+
+    questions = {source(COUNTING).question for _ in range(20)}
+    assert len(questions) == 6 # Every medium coin question, then repeats
+    assert source.exhausted == {(COUNTING, "Coin Probability")}